@@ -0,0 +1,51 @@
+"""add indexes for hot query predicates
+
+Revision ID: 28a0bbd5000f
+Revises:
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '28a0bbd5000f'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# tables are created by init_db (create_all), which also builds these indexes on a
+# fresh database, so every statement here is idempotent.
+INDEXES = [
+    # (name, table, columns, unique)
+    ("ix_time_tables_venue_id", "time_tables", ["venue_id"], False),
+    ("ix_time_tables_course_id", "time_tables", ["course_id"], False),
+    ("ix_time_tables_semester_id", "time_tables", ["semester_id"], False),
+    ("ix_time_table_exceptions_schedule_id_is_cancelled", "time_table_exceptions", ["schedule_id", "is_cancelled"], False),
+    ("ix_courses_department_id_level_id", "courses", ["department_id", "level_id"], False),
+    ("ix_users_role_level_id_department_id", "users", ["role", "level_id", "department_id"], False),
+    ("ix_user_course_course_id_user_id", "user_course", ["course_id", "user_id"], False),
+    ("uq_semesters_school_session_name", "semesters", ["school_session", "name"], True),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+    # school_session on its own is no longer unique: a session has two semesters
+    op.drop_index("ix_semesters_school_session", table_name="semesters", if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        "ix_semesters_school_session", "semesters", ["school_session"], unique=True, if_not_exists=True
+    )
+    for name, table, _columns, _unique in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,42 @@
+"""add lower() indexes for case-insensitive identity lookups
+
+Revision ID: 4eab81f23288
+Revises: 28a0bbd5000f
+Create Date: 2026-10-19 10:03:17.552910
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4eab81f23288'
+down_revision: Union[str, Sequence[str], None] = '28a0bbd5000f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, column); every index is unique on lower(column)
+INDEXES = [
+    ("uq_users_email_lower", "users", "email"),
+    ("uq_users_school_id_lower", "users", "school_id"),
+    ("uq_departments_name_lower", "departments", "name"),
+    ("uq_courses_code_lower", "courses", "code"),
+    ("uq_courses_name_lower", "courses", "name"),
+    ("uq_venues_name_lower", "venues", "name"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # fails if the table already holds values that differ only by case; merge those first
+    for name, table, column in INDEXES:
+        op.create_index(name, table, [sa.text(f"lower({column})")], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _column in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
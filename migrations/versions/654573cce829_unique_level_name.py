@@ -0,0 +1,29 @@
+"""make level names unique
+
+Revision ID: 654573cce829
+Revises: 4eab81f23288
+Create Date: 2026-10-19 11:26:05.104377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '654573cce829'
+down_revision: Union[str, Sequence[str], None] = '4eab81f23288'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_level relies on this for INSERT ... ON CONFLICT DO NOTHING
+    op.create_index("uq_levels_name", "levels", ["name"], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_levels_name", table_name="levels", if_exists=True)
@@ -0,0 +1,170 @@
+"""
+Time resolving each route's dependencies, and count the services it builds.
+
+Runs FastAPI's own dependency resolution (solve_dependencies, plus closing the
+request's session) for every API route of the app, as a request to it would, but
+with the dependencies that do I/O answered by stand-ins: the token bearers,
+get_current_user and the role checks return a fixed admin token and principal,
+while still depending on what they depend on (get_user_service and the rest). No
+database or Redis is touched, as no service runs a query; so what is timed is
+the overhead a request pays before its handler starts, most of it building the
+services the handler may or may not use.
+
+    python -m src.bench_dependencies --samples 500
+    python -m src.bench_dependencies --route timetable
+"""
+import argparse
+import asyncio
+import dataclasses
+import re
+import statistics
+import time
+import uuid
+from collections import Counter
+from contextlib import AsyncExitStack
+
+from fastapi.dependencies.models import Dependant
+from fastapi.dependencies.utils import solve_dependencies
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+
+from src.main import app
+from src.v1.admin.service import AdminService
+from src.v1.auth.authorization import RoleCheck
+from src.v1.auth.schema import Principal
+from src.v1.auth.service import TokenService
+from src.v1.controllers.util import get_current_user
+from src.v1.model.user import Role_Enum
+from src.v1.service.api_key_service import ApiKeyService
+from src.v1.service.courses import CourseService, DeptService
+from src.v1.service.lecturer_service import LecturerService
+from src.v1.service.level_service import LevelService
+from src.v1.service.loaders import Loaders
+from src.v1.service.semester_service import SemesterService
+from src.v1.service.student_service import StudentService
+from src.v1.service.timetable_service import TimeTableService
+from src.v1.service.user import UserService
+from src.v1.service.venue_service import VenueService
+
+SERVICES = (
+    UserService, CourseService, DeptService, LecturerService, StudentService, TimeTableService,
+    VenueService, SemesterService, LevelService, AdminService, ApiKeyService, Loaders,
+)
+
+PRINCIPAL = Principal(id=uuid.uuid4(), role=Role_Enum.ADMIN)
+TOKEN = {"user": {"user_id": str(PRINCIPAL.id), "role": PRINCIPAL.role}, "type": "access"}
+
+built = Counter()
+
+
+def count_services():
+    """Counts every service constructed into `built`."""
+    for cls in SERVICES:
+        init = cls.__init__
+
+        def counted(self, *args, _init=init, _name=cls.__name__, **kwargs):
+            built[_name] += 1
+            _init(self, *args, **kwargs)
+
+        cls.__init__ = counted
+
+
+def _stand_in(result):
+    async def dependency(**_):
+        return result
+    return dependency
+
+
+def stub(dependant: Dependant, stand_ins: dict) -> Dependant:
+    """`dependant` with the calls that do I/O swapped for stand-ins; their own
+    dependencies are kept, and resolved as before."""
+    call = dependant.call
+    if call is not None and call not in stand_ins:
+        if isinstance(call, TokenService):
+            stand_ins[call] = _stand_in(TOKEN)
+        elif call is get_current_user or isinstance(call, RoleCheck):
+            stand_ins[call] = _stand_in(PRINCIPAL)
+    return dataclasses.replace(
+        dependant,
+        call=stand_ins.get(call, call),
+        dependencies=[stub(sub, stand_ins) for sub in dependant.dependencies],
+    )
+
+
+def build_request(route: APIRoute, stack: AsyncExitStack) -> Request:
+    # every path parameter of this API is an id
+    path_params = {name: str(uuid.uuid4()) for name in route.param_convertors}
+    path = re.sub(r"{([^}]+)}", lambda match: path_params[match.group(1)], route.path_format)
+    return Request({
+        "type": "http",
+        "method": sorted(route.methods)[0],
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"authorization", b"Bearer bench")],
+        "path_params": path_params,
+        "app": app,
+        "state": {},
+        # what the route's handler sets up, and closes once the response is sent
+        "fastapi_inner_astack": stack,
+        "fastapi_function_astack": stack,
+    })
+
+
+async def resolve(route: APIRoute, dependant: Dependant) -> bool:
+    """Resolves the route's dependencies once; False if they didn't validate (a
+    required body, which isn't sent)."""
+    async with AsyncExitStack() as stack:
+        solved = await solve_dependencies(
+            request=build_request(route, stack),
+            dependant=dependant,
+            async_exit_stack=stack,
+            embed_body_fields=False,
+        )
+    return not solved.errors
+
+
+async def bench(routes, samples: int):
+    stand_ins = {}
+    print(f"{'route':<52} {'median us':>10} {'services':>9}  built")
+    timings = []
+    for route in routes:
+        dependant = stub(route.dependant, stand_ins)
+        # warm up, and count what one request builds
+        built.clear()
+        valid = await resolve(route, dependant)
+        per_request = dict(built)
+
+        runs = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            await resolve(route, dependant)
+            runs.append((time.perf_counter() - started) * 1e6)
+        median = statistics.median(runs)
+        timings.append((median, sum(per_request.values())))
+
+        name = f"{','.join(sorted(route.methods))} {route.path}" + ("" if valid else " *")
+        names = ", ".join(f"{cls}x{count}" if count > 1 else cls for cls, count in sorted(per_request.items()))
+        print(f"{name[:52]:<52} {median:>10.1f} {sum(per_request.values()):>9}  {names}")
+
+    print(f"\n{len(timings)} routes: mean {statistics.mean(t for t, _ in timings):.1f} us, "
+          f"{statistics.mean(n for _, n in timings):.2f} services per request")
+    print("* body not sent, its validation fails after the dependencies resolved")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--route", help="only routes whose path contains this")
+    args = parser.parse_args()
+
+    count_services()
+    routes = [
+        route for route in app.routes
+        if isinstance(route, APIRoute) and (args.route is None or args.route in route.path)
+    ]
+    asyncio.run(bench(routes, args.samples))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Compare the old and the orjson success_response on large course lists.
+
+Builds N CourseResponse rows (as the routes produce them, dumped to dicts, and
+as models handed over directly) and times encoding the full response body:
+
+- jsonable: SuccessResponse.model_dump() + jsonable_encoder + JSONResponse, the old path
+- orjson:   success_response with the route's dicts
+- models:   success_response with the models themselves, serialized by pydantic
+
+and the whole route, from source rows to body: a model_validate().model_dump()
+per row on the old path, against the COURSE profile's dump_many.
+
+    python -m src.bench_response --rows 1000 5000 20000
+"""
+import argparse
+import datetime
+import json
+import statistics
+import time
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from src.util.response import success_response
+from src.v1.base.schema import SuccessResponse
+from src.v1.model.user import Level_Enum
+from src.v1.schema.courses import CourseResponse
+from src.v1.schema.profiles import COURSE
+
+
+def build_rows(rows: int) -> list:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    departments = [{"id": uuid.uuid4(), "name": f"Department {i}", "created_at": now, "updated_at": now} for i in range(20)]
+    levels = [{"id": uuid.uuid4(), "name": level, "created_at": now, "updated_at": now} for level in Level_Enum]
+    return [
+        {
+            "id": uuid.uuid4(),
+            "name": f"Course {i}",
+            "code": f"CSC{i:05d}",
+            "department": departments[i % len(departments)],
+            "level": levels[i % len(levels)],
+        }
+        for i in range(rows)
+    ]
+
+
+def jsonable_response(data) -> bytes:
+    content = SuccessResponse(message="success", data=data)
+    return JSONResponse(content=jsonable_encoder(content.model_dump())).body
+
+
+def per_row_route(rows) -> bytes:
+    data = [CourseResponse.model_validate(row).model_dump(exclude=COURSE.exclude) for row in rows]
+    return jsonable_response(data)
+
+
+def profile_route(rows) -> bytes:
+    return success_response(data=COURSE.dump_many(rows)).body
+
+
+def time_encoder(encode, data, samples: int) -> float:
+    """Median milliseconds to encode one response body."""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        encode(data)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--samples", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'jsonable ms':>12} {'orjson ms':>10} {'models ms':>10} {'speedup':>8}")
+    for rows in args.rows:
+        courses = [CourseResponse.model_validate(row) for row in build_rows(rows)]
+        dicts = [course.model_dump() for course in courses]
+        # same document either way, only the bytes' formatting differs
+        assert json.loads(jsonable_response(dicts)) == json.loads(success_response(data=dicts).body)
+
+        baseline = time_encoder(jsonable_response, dicts, args.samples)
+        fast = time_encoder(lambda data: success_response(data=data).body, dicts, args.samples)
+        models = time_encoder(lambda data: success_response(data=data).body, courses, args.samples)
+        print(f"{rows:>7} {baseline:>12.2f} {fast:>10.2f} {models:>10.2f} {baseline / fast:>7.1f}x")
+
+    print(f"\n{'rows':>7} {'per-row ms':>12} {'profile ms':>10} {'speedup':>8}")
+    for rows in args.rows:
+        source = build_rows(rows)
+        assert json.loads(per_row_route(source)) == json.loads(profile_route(source))
+
+        baseline = time_encoder(per_row_route, source, args.samples)
+        profiled = time_encoder(profile_route, source, args.samples)
+        print(f"{rows:>7} {baseline:>12.2f} {profiled:>10.2f} {baseline / profiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
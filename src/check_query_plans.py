@@ -0,0 +1,99 @@
+"""
+Fail if a hot query can only be answered with a sequential scan.
+
+Runs EXPLAIN for the predicates the services filter on, with sequential scans
+disabled for the session, so the planner picks an index whenever one exists
+(even on a small dev database where a seq scan would otherwise be cheaper).
+
+    python -m src.check_query_plans
+"""
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from src.util.db import engine
+from src.v1.model import Course, Department, Role_Enum, Semester, TimeTable, TimeTableException, User, Venue
+from src.v1.model.timetable import Semester_Enum
+from src.v1.model.user import user_course_association
+
+_id = uuid.uuid4()
+
+# (description, statement) -- the where clauses mirror the ones in src/v1/service
+HOT_QUERIES = [
+    ("timetables by venue (conflict check)",
+     select(TimeTable.id).where(TimeTable.venue_id == _id)),
+    ("timetables by course (student/lecturer timetable)",
+     select(TimeTable.id).where(TimeTable.course_id.in_([_id, uuid.uuid4()]))),
+    ("timetables by semester",
+     select(TimeTable.id).where(TimeTable.semester_id == _id)),
+    ("cancelled exceptions by schedule",
+     select(TimeTableException.id).where(
+         TimeTableException.schedule_id.in_([_id]), TimeTableException.is_cancelled
+     )),
+    ("courses by department",
+     select(Course.id).where(Course.department_id == _id)),
+    ("courses by level and department",
+     select(Course.id).where(Course.level_id == _id, Course.department_id == _id)),
+    ("students",
+     select(User.id).where(User.role == Role_Enum.STUDENT)),
+    ("students by level",
+     select(User.id).where(User.role == Role_Enum.STUDENT, User.level_id == _id)),
+    ("lecturers by course",
+     select(user_course_association.c.user_id).where(user_course_association.c.course_id == _id)),
+    ("semester by session and name",
+     select(Semester.id).where(
+         Semester.school_session == "2025/2026", Semester.name == Semester_Enum.FIRST_SEMESTER
+     )),
+    ("user by id",
+     select(User.id).where(User.id == _id)),
+    ("user by email (login)",
+     select(User.id).where(func.lower(User.email) == "someone@example.com")),
+    ("user by school id (login)",
+     select(User.id).where(func.lower(User.school_id) == "csc/2020/001")),
+    ("department by name",
+     select(Department.id).where(func.lower(Department.name) == "computer science")),
+    ("course by code or name",
+     select(Course.id).where(
+         (func.lower(Course.code) == "csc101") | (func.lower(Course.name) == "intro to computing")
+     )),
+    ("venue by name",
+     select(Venue.id).where(func.lower(Venue.name) == "lecture theatre 1")),
+]
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    scans = []
+    if plan.get("Node Type") == "Seq Scan":
+        scans.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        scans.extend(_seq_scans(child))
+    return scans
+
+
+async def check_query_plans() -> bool:
+    failures = []
+    async with engine.connect() as conn:
+        await conn.execute(text("SET enable_seqscan = off"))
+        for description, stmt in HOT_QUERIES:
+            sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar_one()[0]["Plan"]
+            scans = _seq_scans(plan)
+            if scans:
+                failures.append(description)
+                print(f"FAIL  {description}: sequential scan on {', '.join(scans)}")
+            else:
+                print(f"ok    {description}")
+
+    if failures:
+        print(f"{len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} fall back to a sequential scan")
+        return False
+    print("all hot queries use an index")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(check_query_plans()) else 1)
@@ -0,0 +1,59 @@
+"""
+Pick a password hashing cost for a target latency on this machine.
+
+Times one hash at increasing cost until it passes the target, then prints the
+highest cost that stays within it, ready to paste into the environment.
+
+    python -m src.hash_benchmark --target-ms 250 --scheme bcrypt
+"""
+import argparse
+import statistics
+import time
+
+from src.util.config import config
+from src.v1.auth.service import PASSWORD_SCHEMES, build_crypt_context
+
+# (lowest, highest) cost tried per scheme: log2 rounds for bcrypt/scrypt, time_cost for argon2
+COST_RANGES = {"bcrypt": (4, 18), "scrypt": (10, 20), "argon2": (1, 16)}
+
+
+def time_hash(scheme: str, rounds: int, samples: int) -> float:
+    """Median milliseconds for a single hash at this cost."""
+    ctx = build_crypt_context(scheme, rounds, role_rounds={})
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        ctx.hash("correct horse battery staple")
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def pick_rounds(scheme: str, target_ms: float, samples: int):
+    low, high = COST_RANGES[scheme]
+    chosen = None
+    for rounds in range(low, high + 1):
+        elapsed = time_hash(scheme, rounds, samples)
+        print(f"{scheme:<7} rounds={rounds:<3} {elapsed:9.1f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--scheme", choices=PASSWORD_SCHEMES, default=config.password_scheme)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    rounds = pick_rounds(args.scheme, args.target_ms, args.samples)
+    if rounds is None:
+        print(f"even the lowest {args.scheme} cost takes longer than {args.target_ms:g} ms")
+        return
+    print(f"\nPASSWORD_SCHEME={args.scheme}")
+    print(f"PASSWORD_HASH_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
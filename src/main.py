@@ -1,15 +1,21 @@
+import asyncio
+
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from src.util.db import init_db, drop_db
-from src.util.redis_client import setup_redis
+from src.util.redis_client import close_redis, monitor_redis, setup_redis
 from fastapi.middleware.cors import CORSMiddleware
 from src.util.config import Settings 
+from src.util.encoding import ResponseEncodingMiddleware
 from src.util.exception import register_error_handlers
 from src.v1.controllers.user import user_router
 from src.v1.controllers.school import courses_router
 from src.v1.controllers.level import level_router
-from src.v1.auth.routes import auth_router
+from src.v1.controllers.batch import batch_router
+from src.v1.auth.routes import auth_router, jwks_router
 from src.v1.admin.routes import admin_router
+from src.v1.auth.revocation import sync_revocations
+from src.v1.service.reference_data import reference_cache, warm_reference_cache
 @asynccontextmanager
 async def life_span(app: FastAPI):
     """
@@ -38,10 +44,23 @@ async def life_span(app: FastAPI):
     print("redis is starting....")
     await setup_redis()
     print("redis has started!!")
+    # closes the redis circuit breaker again once redis answers
+    redis_monitor = asyncio.create_task(monitor_redis())
+
+    # mirror revoked tokens into this worker's filter
+    revocation_sync = asyncio.create_task(sync_revocations())
+
+    # load levels, departments, venues and semesters before the first request needs them
+    reference_sync = asyncio.create_task(reference_cache.listen())
+    await warm_reference_cache()
     yield  # Yield control back to FastAPI
     
     # Shutdown: Perform any necessary cleanup
     print("server is ending.....")
+    revocation_sync.cancel()
+    reference_sync.cancel()
+    redis_monitor.cancel()
+    await close_redis()
 
 app = FastAPI(
     lifespan=life_span,
@@ -58,6 +77,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# MessagePack and br/gzip for the clients that ask for them
+app.add_middleware(ResponseEncodingMiddleware)
+
 #register error handlers 
 register_error_handlers(app)
 
@@ -67,6 +89,8 @@ app.include_router(user_router, prefix=Settings.API_PREFIX)
 app.include_router(courses_router, prefix=Settings.API_PREFIX)
 app.include_router(level_router, prefix=Settings.API_PREFIX)
 app.include_router(admin_router, prefix=Settings.API_PREFIX)
+app.include_router(batch_router, prefix=Settings.API_PREFIX)
+app.include_router(jwks_router)
 
 
 
@@ -0,0 +1,139 @@
+"""
+In-process GET sub-requests, for POST /batch.
+
+Each sub-request goes through the whole app (middleware, dependencies, error
+handlers) as if it had been sent on its own with the batch's headers, so it
+answers exactly as that request would. What separate requests would each redo is
+done once: the access token is verified and the principal resolved by the batch
+request itself (see TokenService and get_current_user), and every sub-request
+reads through one SharedSession, so the batch holds a single database connection.
+The sub-requests run concurrently; their statements take turns on it.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List
+from urllib.parse import unquote
+
+import orjson
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Scope
+
+from src.util import metrics
+from src.util.db import SharedSession, shared_session
+from src.util.log import setup_logger
+from src.v1.base.schema import ErrorResponse
+from src.v1.schema.batch import BatchItem
+
+logger = setup_logger(__name__, "batch.log")
+
+# headers of the batch request that describe its own body or negotiation
+_DROPPED_HEADERS = {
+    b"content-length", b"content-type", b"transfer-encoding", b"expect",
+    b"accept", b"accept-encoding", b"if-none-match",
+}
+# sub-response headers returned in its entry
+_KEPT_HEADERS = ("etag", "cache-control")
+
+
+@dataclass
+class BatchContext:
+    """What the sub-requests of one batch share; set as request.state.batch."""
+
+    token: str
+    token_data: dict
+    principal: Any
+    session: SharedSession
+
+
+class _Streamed(BaseException):
+    """A sub-request answered with a streamed response. Not an Exception, so that it
+    unwinds past the app's catch-all error handler (which would log it) to _dispatch."""
+
+
+def _error(status_code: int, message: str, error_code: str) -> dict:
+    body = ErrorResponse(status="error", message=message, error_code=error_code, data=None)
+    return {"status": status_code, "headers": {}, "body": body.model_dump()}
+
+
+async def _dispatch(app: ASGIApp, scope: Scope, batch: BatchContext, item: BatchItem) -> dict:
+    path, _, query = item.path.partition("?")
+    headers = [(name, value) for name, value in scope["headers"] if name not in _DROPPED_HEADERS]
+    headers.append((b"accept", b"application/json"))
+    if item.if_none_match:
+        headers.append((b"if-none-match", item.if_none_match.encode()))
+    sub_scope = {
+        **{key: scope[key] for key in ("asgi", "http_version", "scheme", "server", "client", "root_path") if key in scope},
+        "type": "http",
+        "method": "GET",
+        "path": unquote(path),
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": headers,
+        # only set here, never from anything the client sends
+        "state": {**scope.get("state", {}), "batch": batch},
+    }
+
+    requested = False
+
+    async def receive() -> Message:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.disconnect"}
+
+    start: Message = {}
+    chunks: List[bytes] = []
+
+    async def send(message: Message):
+        nonlocal start
+        if message["type"] == "http.response.start":
+            start = message
+        elif message["type"] == "http.response.body":
+            if message.get("more_body", False):
+                # stops the response before it reads anything
+                raise _Streamed()
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(sub_scope, receive, send)
+    except _Streamed:
+        return _error(400, "Streamed responses (exports) can't be batched, request them on their own", "bad_request")
+    except Exception as e:
+        # what the app didn't handle itself; ServerErrorMiddleware re-raises it
+        logger.error(f"batch sub-request {item.path} failed: {e}", exc_info=True)
+        return _error(500, "Internal server error", "server_error")
+
+    response_headers = Headers(raw=start["headers"])
+    content = b"".join(chunks)
+    if not content:
+        body = None
+    elif response_headers.get("content-type", "").startswith("application/json"):
+        # already JSON: spliced into the batch response as it is
+        body = orjson.Fragment(content)
+    else:
+        body = content.decode("utf-8", "replace")
+    return {
+        "status": start["status"],
+        "headers": {name: response_headers[name] for name in _KEPT_HEADERS if name in response_headers},
+        "body": body,
+    }
+
+
+async def run_batch(app: ASGIApp, scope: Scope, items: List[BatchItem], token: str, token_data: dict, principal: Any) -> Dict[str, dict]:
+    """Each item's response, keyed by its id and in the order given."""
+    started = time.perf_counter()
+    async with shared_session() as session:
+        batch = BatchContext(token=token, token_data=token_data, principal=principal, session=session)
+        try:
+            entries = await asyncio.gather(*(_dispatch(app, scope, batch, item) for item in items))
+            await session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in batch: {e}")
+            await session.rollback()
+            raise
+    metrics.incr("batch.sub_requests", len(items))
+    metrics.observe("batch.duration", time.perf_counter() - started)
+    return {item.id: entry for item, entry in zip(items, entries)}
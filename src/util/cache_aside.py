@@ -0,0 +1,144 @@
+"""
+Cache-aside for service methods, invalidated by tag.
+
+    @cached(List[CourseResponse], tags=("courses", "dept:{dept_id}"))
+    async def fetch_all_courses_for_a_dept(self, dept_id): ...
+
+The result is validated into the given type and stored as JSON through
+`get_or_fetch_cache`, so a hit returns schema instances rather than ORM rows.
+Tags are formatted with the method's arguments. Each tag has a version counter
+in redis and the versions are part of the entry's key, so `invalidate_tags`
+only has to INCR them: entries written under the old versions are never read
+again and expire on their own, without a SCAN or a DEL per key.
+"""
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List
+
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from src.util import metrics
+from src.util.log import setup_logger
+from src.util.redis_client import (
+    CACHE_TTL,
+    clear_local_cache,
+    get_many,
+    get_or_fetch_cache,
+    get_or_fetch_local,
+    get_redis,
+    set_many,
+)
+
+logger = setup_logger(__name__, "cache_aside.log")
+
+TAG_PREFIX = "tag:"
+
+
+def tag_key(tag: str) -> str:
+    """The redis key of `tag`'s version counter."""
+    return TAG_PREFIX + tag
+
+
+async def _tag_versions(tags: list) -> list:
+    if not tags:
+        return []
+    redis = await get_redis()
+    # tag counters never expire: one that reset to an old value could make a
+    # stale entry reachable again. There is one per tag, so they stay few
+    versions = await redis.mget([tag_key(tag) for tag in tags])
+    return [version or "0" for version in versions]
+
+
+async def invalidate_tags(*tags: str):
+    """Make every entry cached under any of `tags` unreachable. Call after committing."""
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(tag_key(tag))
+            await pipe.execute()
+        logger.info(f"invalidated cache tags {tags}")
+    except Exception as e:
+        # entries under these tags stay readable in redis until their ttl runs out;
+        # at least this worker shouldn't serve its own stale fallback entries
+        logger.error(f"failed to invalidate cache tags {tags}: {e}")
+        clear_local_cache()
+
+
+def cached(result_type: Any, tags: Iterable[str] = (), ttl: int = CACHE_TTL):
+    """Cache an async service method's result in redis, keyed by its arguments
+    (other than `self`) and the current versions of `tags`."""
+    adapter = TypeAdapter(result_type)
+    tags = tuple(tags)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: v for k, v in bound.arguments.items() if k != "self"}
+
+            async def fetch():
+                result = await func(*args, **kwargs)
+                return adapter.dump_python(
+                    adapter.validate_python(result, from_attributes=True), mode="json"
+                )
+
+            entry_tags = [tag.format(**arguments) for tag in tags]
+            key = ":".join(["cache", name, *(str(v) for v in arguments.values())])
+            try:
+                versions = await _tag_versions(entry_tags)
+            except RedisError as e:
+                # without the versions only this worker's own cache can be trusted
+                logger.error(f"cache unavailable for {name}, caching locally: {e}")
+                data = await get_or_fetch_local(key, fetch, ttl=ttl)
+            else:
+                data = await get_or_fetch_cache(f"{key}:v{'.'.join(versions)}", fetch, ttl=ttl)
+            return adapter.validate_python(data)
+
+        return wrapper
+
+    return decorator
+
+
+async def get_or_fetch_many(
+    name: str,
+    ids: List[Hashable],
+    fetch_missing: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+    result_type: Any,
+    tags: Iterable[str] = (),
+    ttl: int = CACHE_TTL,
+) -> Dict[Hashable, Any]:
+    """Cached values for many ids of one kind: the tag versions and the values are read
+    in one round trip each, `fetch_missing` loads every miss in one call (it must
+    return a value for each id it gets) and those are written back in one pipeline."""
+    adapter = TypeAdapter(result_type)
+
+    async def fetch(ids):
+        return {
+            id_: adapter.validate_python(value, from_attributes=True)
+            for id_, value in (await fetch_missing(ids)).items()
+        }
+
+    try:
+        suffix = "v" + ".".join(await _tag_versions(list(tags)))
+    except RedisError as e:
+        logger.error(f"cache unavailable for {name}, calling through: {e}")
+        metrics.incr("cache_aside.bypass")
+        return await fetch(list(ids))
+    keys = {id_: f"cache:{name}:{id_}:{suffix}" for id_ in ids}
+    cached = await get_many(list(keys.values()))
+
+    found = {id_: adapter.validate_python(value) for id_, value in zip(keys, cached) if value is not None}
+    missing = [id_ for id_ in keys if id_ not in found]
+    metrics.incr("cache_aside.hit", len(found))
+    if missing:
+        metrics.incr("cache_aside.miss", len(missing))
+        fresh = await fetch(missing)
+        await set_many({keys[id_]: adapter.dump_python(value, mode="json") for id_, value in fresh.items()}, ttl=ttl)
+        found.update(fresh)
+    return found
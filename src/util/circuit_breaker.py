@@ -0,0 +1,61 @@
+"""
+Circuit breaker for a dependency the app can run without (redis).
+
+Closed, calls go through and consecutive failures are counted. After
+`failure_threshold` of them it opens and calls fail fast, so a dead dependency
+costs nothing per request instead of a connect timeout. Once `reset_timeout`
+seconds have passed it lets one trial call through (half-open), and another
+every `reset_timeout` after that: success closes it, failure keeps it open.
+"""
+import time
+
+from src.util import metrics
+from src.util.log import setup_logger
+
+logger = setup_logger(__name__, "circuit_breaker.log")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self.state != CLOSED
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; a True while open claims the trial."""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        # also re-arms a trial whose caller never reported back (e.g. was cancelled)
+        if now - self._opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._opened_at = now
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        if self.state != CLOSED:
+            self.state = CLOSED
+            metrics.set_gauge(f"{self.name}.breaker_open", 0)
+            logger.info(f"{self.name} circuit closed")
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state == CLOSED:
+                logger.error(f"{self.name} circuit opened after {self._failures} consecutive failures")
+            self.state = OPEN
+            self._opened_at = time.monotonic()
+            metrics.set_gauge(f"{self.name}.breaker_open", 1)
@@ -1,14 +1,79 @@
 from pathlib import Path
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Config(BaseSettings):
     DATABASE_URL: str 
     redis_url: str
-    jwt_secret_key:str
+    # redis connection pool; idle connections are pinged before reuse once older than
+    # the health check interval (seconds). The read timeout stays off by default since
+    # the pub/sub listeners block on reads
+    redis_max_connections: int = 50
+    redis_health_check_interval: int = 30
+    redis_socket_connect_timeout: float = 2.0
+    redis_socket_timeout: Optional[float] = None
+    # after this many consecutive connection failures redis calls fail fast for the
+    # reset timeout (seconds) before one is tried again; meanwhile the caches fall back
+    # to a per-worker copy whose entries live at most redis_fallback_ttl seconds
+    redis_breaker_failure_threshold: int = 5
+    redis_breaker_reset_timeout: float = 5.0
+    redis_fallback_cache_size: int = 10_000
+    redis_fallback_ttl: int = 30
+    jwt_secret_key: Optional[str] = None
     jwt_algo:str 
+    # PEM signing key for an asymmetric jwt_algo, and the public PEMs of retired keys
+    # whose tokens are still accepted (see src/v1/auth/keys.py)
+    jwt_private_key_file: Optional[str] = None
+    jwt_previous_public_key_files: list[str] = []
     access_token_expiry:int
     refresh_token_expiry:int
 
+    # password hashing runs in a thread pool of this size, off the event loop
+    password_hash_workers: int = 4
+    # new hashes use this scheme; hashes made with any other scheme, or below the configured
+    # cost, are replaced on the user's next successful login
+    password_scheme: Literal["bcrypt", "argon2", "scrypt"] = "bcrypt"
+    # log2 rounds for bcrypt/scrypt, time_cost for argon2; passlib's default when unset.
+    # python -m src.hash_benchmark suggests a value for a target latency
+    password_hash_rounds: Optional[int] = None
+    # per-role override of the cost, e.g. PASSWORD_ROLE_ROUNDS='{"admin": 14}'
+    password_role_rounds: dict[str, int] = {}
+    # argon2 memory cost in KiB; passlib's default when unset
+    argon2_memory_cost: Optional[int] = None
+
+    # seconds the authenticated principal (id, role, level, department) stays cached,
+    # in each worker and in redis; a role change can take this long to apply everywhere
+    principal_cache_ttl: int = 60
+    # verified token claims kept per worker, so a reused token skips signature checks
+    token_cache_size: int = 10_000
+    # revoked jtis are mirrored into a per-worker bloom filter sized for this many
+    # entries, rebuilt from redis every interval (seconds) to shed expired ones
+    revocation_filter_capacity: int = 100_000
+    revocation_filter_rebuild_interval: int = 300
+
+    # api keys are looked up by their HMAC under this secret (jwt_secret_key when unset);
+    # changing it invalidates every issued key
+    api_key_secret: Optional[str] = None
+    # seconds a verified key (or an unknown one) stays cached per worker; a revoked key
+    # can keep working in other workers for this long
+    api_key_cache_ttl: int = 60
+    api_key_rate_limit_per_minute: int = 600
+
+    # levels, departments, venues and semesters: seconds a snapshot lives in redis, and
+    # in each worker (the local copy is also dropped through pub/sub on every write)
+    reference_cache_ttl: int = 3600
+    reference_cache_local_ttl: int = 300
+
+    # JSON responses of at least this many bytes are compressed for clients that accept
+    # br or gzip; encoded bodies of responses with an ETag are kept per worker, this many
+    # for at most this many seconds (see src/util/encoding.py)
+    compression_minimum_size: int = 1024
+    compressed_cache_size: int = 512
+    compressed_cache_ttl: int = 300
+
+    # most GET sub-requests one POST /batch may carry
+    batch_max_requests: int = 10
+
 
     model_config = SettingsConfigDict(
         case_sensitive=False,
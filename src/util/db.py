@@ -1,14 +1,19 @@
+import asyncio
 from typing import AsyncGenerator
+from fastapi import Request
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from .config import config
 from src.v1.base.model import Base
 from src.v1.model import *
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.pool import NullPool
 from contextlib import asynccontextmanager
-from sqlalchemy import text
+from sqlalchemy import Select, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
 
 from src.util.log import setup_logger
+from src.v1.base.exception import BadRequest
 logger = setup_logger(__name__, file_path="db.log")
 
 # Create async engine
@@ -25,6 +30,39 @@ async_session = async_sessionmaker(
 )
 
 
+class SharedSession(AsyncSession):
+    """
+    A session several concurrent tasks read through, e.g. the sub-requests of a
+    /batch request: its statements take turns on the one connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._turn = asyncio.Lock()
+
+    # scalars() and stream_scalars() go through execute() and stream()
+    async def execute(self, *args, **kwargs):
+        async with self._turn:
+            return await super().execute(*args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        async with self._turn:
+            return await super().scalar(*args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        async with self._turn:
+            return await super().get(*args, **kwargs)
+
+    async def stream(self, *args, **kwargs):
+        # a server-side cursor would hold the connection while the others wait
+        raise BadRequest("Streamed responses can't share a session, request them on their own")
+
+
+shared_session = async_sessionmaker(
+    bind=engine, class_=SharedSession, expire_on_commit=False
+)
+
+
 
 # @asynccontextmanager
 # #this helps in a way that, each internal async function in the bg task gets a new session, which prevent event loop or connection issue, coupled with the poolclass=NullPool param when creating the engine, it opens a new connection 
@@ -53,13 +91,55 @@ async_session = async_sessionmaker(
 # )
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+# Postgres SQLSTATE codes raised as IntegrityError
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+
+
+def integrity_error_details(error: IntegrityError) -> tuple[str | None, str | None]:
+    """
+    Return the (sqlstate, constraint_name) of the driver error behind an IntegrityError.
+    """
+    orig = getattr(error, "orig", None)
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    constraint_name = getattr(getattr(orig, "__cause__", None), "constraint_name", None)
+    return sqlstate, constraint_name
+
+
+def insert_returning(model, **values) -> Select:
+    """
+    Build a single statement that inserts a row and selects it back as `model`.
+
+    The INSERT ... ON CONFLICT DO NOTHING RETURNING runs in a CTE and the outer
+    select maps its output onto the model, so joined relationships load in the same
+    round-trip. No row comes back when a unique constraint already holds the values;
+    a foreign key violation raises IntegrityError.
+    """
+    new_row = (
+        pg_insert(model)
+        .values(**values)
+        .on_conflict_do_nothing()
+        .returning(*model.__table__.c)
+        .cte(f"new_{model.__tablename__}")
+    )
+    return select(aliased(model, new_row))
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     """
     Dependency function to get database session.
 
+    A sub-request of a /batch request gets the batch's shared session, which the
+    batch commits and closes itself.
+
     Yields:
         AsyncSession: Database session
     """
+    batch = getattr(request.state, "batch", None)
+    if batch is not None:
+        yield batch.session
+        return
+
     async with async_session() as session:
         try:
             yield session
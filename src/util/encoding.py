@@ -0,0 +1,192 @@
+"""
+Negotiated response encodings.
+
+JSON responses (success_response, the error handlers, anything else rendered
+whole) are re-encoded on the way out to what the client asked for:
+
+- `Accept: application/msgpack` gets the same document as MessagePack, when the
+  `msgpack` extra is installed;
+- `Accept-Encoding: br` or `gzip` gets the body compressed (br needs the `brotli`
+  extra), once it is at least config.compression_minimum_size bytes.
+
+Without the extras the response is plain JSON, as before. Streamed exports are
+passed through untouched.
+
+A response with an ETag (see etag.py, whose ETags already differ per
+representation) is cacheable: its encoded body is kept per worker under that ETag,
+compressed harder since it is reused, and served as it is while the ETag holds.
+"""
+import gzip
+from typing import Optional, Tuple
+
+import anyio
+import orjson
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.util import metrics
+from src.util.cache import TTLCache
+from src.util.config import config
+
+try:
+    import msgpack
+except ImportError:  # pip install .[msgpack]
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pip install .[brotli]
+    brotli = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+_MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+# server preference among equally acceptable codings
+CODINGS = tuple(coding for coding, available in (("br", brotli), ("gzip", True)) if available)
+
+VARY = "Accept, Accept-Encoding"
+
+# bodies larger than this are compressed in a worker thread, off the event loop
+_THREAD_THRESHOLD = 256 * 1024
+
+_encoded = TTLCache(maxsize=config.compressed_cache_size, ttl=config.compressed_cache_ttl)
+
+
+def _qvalues(header: str) -> dict:
+    """{token: q} for an Accept or Accept-Encoding header."""
+    values = {}
+    for item in header.split(","):
+        token, *params = item.split(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        values[token] = max(q, values.get(token, 0.0))
+    return values
+
+
+def negotiate(headers: Headers) -> Tuple[str, Optional[str]]:
+    """The media type (JSON or MessagePack) and content coding (None for identity)
+    a request's Accept and Accept-Encoding headers pick, among those installed."""
+    media_type = JSON
+    if msgpack is not None and "msgpack" in headers.get("accept", ""):
+        accept = _qvalues(headers["accept"])
+        wanted = max(accept.get(name, 0.0) for name in _MSGPACK_TYPES)
+        json_q = accept.get(JSON, accept.get("application/*", accept.get("*/*", 0.0)))
+        if wanted > 0 and wanted >= json_q:
+            media_type = MSGPACK
+
+    coding = None
+    accept_encoding = headers.get("accept-encoding")
+    if accept_encoding:
+        codings = _qvalues(accept_encoding)
+        default = codings.get("*", 0.0)
+        best = 0.0
+        for name in CODINGS:
+            q = codings.get(name, default)
+            if q > best:
+                coding, best = name, q
+    return media_type, coding
+
+
+def representation(headers: Headers) -> str:
+    """A tag for the representation negotiate() picks, for cache keys and ETags."""
+    media_type, coding = negotiate(headers)
+    return f"{media_type};{coding or 'identity'}"
+
+
+def compress(body: bytes, coding: str, cached: bool) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=9 if cached else 4)
+    return gzip.compress(body, compresslevel=9 if cached else 5)
+
+
+async def encode(body: bytes, media_type: str, coding: Optional[str], etag: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """`body` (JSON) as `media_type`, compressed with `coding` if it is worth it; the
+    coding actually applied is returned along with it."""
+    key = (etag, media_type, coding) if etag else None
+    if key is not None:
+        hit = _encoded.get(key)
+        if hit is not None:
+            metrics.incr("response_encoding.cache.hit")
+            return hit
+        metrics.incr("response_encoding.cache.miss")
+
+    if media_type == MSGPACK:
+        body = msgpack.packb(orjson.loads(body))
+    if coding is not None and len(body) >= config.compression_minimum_size:
+        if len(body) > _THREAD_THRESHOLD:
+            body = await anyio.to_thread.run_sync(compress, body, coding, key is not None)
+        else:
+            body = compress(body, coding, key is not None)
+    else:
+        coding = None
+
+    if key is not None:
+        _encoded.set(key, (body, coding))
+    return body, coding
+
+
+class ResponseEncodingMiddleware:
+    """Re-encodes whole JSON responses as negotiate() picks; see the module docstring."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        media_type, coding = negotiate(Headers(scope=scope))
+        start: Optional[Message] = None
+
+        async def send_encoded(message: Message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                if message["status"] == 304:
+                    # a 304 carries the Vary the full response would have
+                    headers.add_vary_header(VARY)
+                if not headers.get("content-type", "").startswith(JSON) or "content-encoding" in headers:
+                    await send(message)
+                    return
+                headers.add_vary_header(VARY)
+                if media_type == JSON and coding is None:
+                    await send(message)
+                    return
+                # hold the headers back until the body shows whether it comes whole
+                start = message
+                return
+
+            if start is None:
+                await send(message)
+                return
+            held, start = start, None
+            body = message.get("body", b"")
+            if message["type"] != "http.response.body" or message.get("more_body", False) or not body:
+                # streamed, or nothing to encode
+                await send(held)
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=held["headers"])
+            etag = headers.get("etag") if held["status"] == 200 else None
+            body, applied = await encode(body, media_type, coding, etag)
+            if media_type != JSON:
+                headers["content-type"] = media_type
+            if applied is not None:
+                headers["content-encoding"] = applied
+            headers["content-length"] = str(len(body))
+            await send(held)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_encoded)
@@ -0,0 +1,71 @@
+"""
+Conditional GET for resources whose writes bump a version counter in redis
+(the reference data versions and the cache_aside tags).
+
+The ETag is a hash of those counters and of whatever else the representation
+depends on (who is asking, today's date), so it is known before the handler
+touches the database, and a request whose If-None-Match still matches ends
+there with a 304.
+"""
+import hashlib
+import secrets
+from typing import Optional, Sequence
+
+from fastapi import Request
+from redis.exceptions import RedisError
+
+from src.util import metrics
+from src.util.encoding import representation
+from src.util.log import setup_logger
+from src.util.redis_client import get_redis
+from src.v1.base.exception import NotModified
+
+logger = setup_logger(__name__, "etag.log")
+
+# clients may reuse what they have, but must check back every time
+CACHE_CONTROL = "private, no-cache"
+
+
+async def _versions(keys: Sequence[str]) -> list:
+    redis = await get_redis()
+    versions = await redis.mget(keys)
+    missing = [key for key, version in zip(keys, versions) if version is None]
+    if missing:
+        # a counter that is gone (new, or redis lost its data) restarts at a random
+        # value, so it can't land back on a version a client still holds an ETag for
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in missing:
+                pipe.set(key, secrets.randbits(48), nx=True)
+            await pipe.execute()
+        versions = await redis.mget(keys)
+    return versions
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+async def conditional_get(request: Request, version_keys: Sequence[str], *parts) -> Optional[dict]:
+    """Headers to send with the response (None when redis can't be read, so no ETag);
+    raises NotModified when the client's copy is current."""
+    try:
+        versions = await _versions(version_keys)
+    except RedisError as e:
+        logger.warning(f"no ETag for {request.url.path}: {e}")
+        return None
+
+    # the query string is part of the representation (e.g. a sparse fieldset), and so
+    # are the media type and content coding it is sent in
+    seed = "|".join(
+        [*version_keys, *map(str, versions), *map(str, parts), request.url.query, representation(request.headers)]
+    )
+    etag = '"' + hashlib.sha256(seed.encode()).hexdigest()[:32] + '"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        metrics.incr("etag.not_modified")
+        raise NotModified(headers)
+    metrics.incr("etag.modified")
+    return headers
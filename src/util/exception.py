@@ -3,7 +3,7 @@ from typing import Any, Callable, Dict
 from fastapi import FastAPI, Request, HTTPException, status
 from src.v1.base.schema import ErrorResponse
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -23,8 +23,9 @@ from src.v1.base.exception import (
     ServerError,
     NotActive, 
     BaseExceptionClass,
-    AuthorizationError
-    
+    AuthorizationError,
+    RateLimitExceeded,
+    NotModified,
     
 )
 from src.util.log import setup_logger
@@ -261,6 +262,21 @@ def register_error_handlers(app: FastAPI):
         )
     )
 
+    app.add_exception_handler(
+        RateLimitExceeded,
+        create_exception_handler(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            initial_detail={
+                "status": "error",
+                "message": "Too many requests",
+                "error_code": "rate_limit_exceeded",
+                "resolution": "Please retry in a minute",
+                "data": None,
+                
+            }
+        )
+    )
+
     # Built-in exception handlers
     app.add_exception_handler(
         HTTPException,
@@ -277,6 +293,10 @@ def register_error_handlers(app: FastAPI):
     )
 
 
+    @app.exception_handler(NotModified)
+    async def not_modified_handler(request: Request, exc: NotModified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=exc.headers)
+
     """
     general exception handlers
     """
@@ -0,0 +1,114 @@
+"""
+Request-scoped batched lookups, after the DataLoader pattern.
+
+    user, course = await asyncio.gather(loaders.user.load(user_id), loaders.course.load(course_id))
+
+`load(key)` doesn't query at once: the lookups made in the same event-loop tick
+are collected, then each loader fetches all of its keys in one call (a
+`WHERE id IN (...)`), and every key's result is memoized for the rest of the
+request, so asking again, from any service, costs nothing. The loaders of a
+registry resolve one after another, never concurrently, as they share the
+request's session.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class Loader:
+    def __init__(
+        self,
+        registry: "LoaderRegistry",
+        fetch: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+    ):
+        self._registry = registry
+        # keys -> {key: value} for the keys that exist
+        self._fetch = fetch
+        # turns what callers pass into the fetched keys' type; None for a key that can't exist
+        self._key = key or (lambda value: value)
+        self._memo: Dict[Hashable, asyncio.Future] = {}
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+
+    async def load(self, key: Hashable) -> Optional[Any]:
+        """The value for `key`, or None when there is none."""
+        key = self._key(key)
+        if key is None:
+            return None
+        future = self._memo.get(key)
+        if future is None:
+            future = self._memo[key] = self._pending[key] = asyncio.get_running_loop().create_future()
+            await self._registry.dispatch()
+        # shielded: one caller giving up mustn't cancel the lookup for the others
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> List[Optional[Any]]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: Hashable, value: Any):
+        """Remember `value` for `key`, e.g. an entity the request just created."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._memo[self._key(key)] = future
+
+    def clear(self, key: Hashable):
+        """Forget `key`, so that the next load fetches it again."""
+        self._memo.pop(self._key(key), None)
+
+    async def _resolve(self):
+        batch, self._pending = self._pending, {}
+        try:
+            found = await self._fetch(list(batch))
+        except BaseException as e:
+            for key, future in batch.items():
+                # not memoized, the next load tries again
+                self._memo.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+                    # retrieved here, in case every caller has gone
+                    future.exception()
+            raise
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+class LoaderRegistry:
+    """The loaders of one request; subclasses declare them with `loader()`."""
+
+    def __init__(self):
+        self._loaders: List[Loader] = []
+        self._dispatching = False
+
+    def loader(
+        self,
+        fetch: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        key: Optional[Callable[[Any], Optional[Hashable]]] = None,
+    ) -> Loader:
+        loader = Loader(self, fetch, key)
+        self._loaders.append(loader)
+        return loader
+
+    async def dispatch(self):
+        """Called by the first load of a tick, which then fetches for everyone."""
+        if self._dispatching:
+            return
+        self._dispatching = True
+        try:
+            # one pass of the event loop, for the other lookups of this tick to queue up
+            await asyncio.sleep(0)
+            while any(loader._pending for loader in self._loaders):
+                for loader in self._loaders:
+                    if loader._pending:
+                        try:
+                            await loader._resolve()
+                        except Exception:
+                            # already handed to that loader's callers
+                            pass
+        finally:
+            self._dispatching = False
+            # cancelled midway: nobody would fetch what is still queued
+            for loader in self._loaders:
+                for key, future in loader._pending.items():
+                    loader._memo.pop(key, None)
+                    future.cancel()
+                loader._pending = {}
@@ -0,0 +1,75 @@
+"""
+In-process metrics: counters, gauges and latency histograms.
+
+Values are per worker process and are read through `snapshot()` (served on the
+admin metrics endpoint). Everything runs on the event loop thread, except where a
+caller updates a gauge from a worker thread, where a plain assignment is enough.
+"""
+import bisect
+from collections import defaultdict
+from typing import Dict
+
+# upper bounds in milliseconds; the last bucket catches everything above
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value_ms: float):
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+
+    def to_dict(self) -> dict:
+        labels = [f"le_{b}ms" for b in self.buckets] + ["le_inf"]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+_counters: Dict[str, int] = defaultdict(int)
+_gauges: Dict[str, float] = {}
+_histograms: Dict[str, Histogram] = {}
+
+
+def incr(name: str, value: int = 1):
+    _counters[name] += value
+
+
+def set_gauge(name: str, value: float):
+    _gauges[name] = value
+
+
+def observe(name: str, seconds: float):
+    """Record a duration, given in seconds, on the named latency histogram."""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = Histogram()
+    histogram.observe(seconds * 1000)
+
+
+def hit_rate(prefix: str) -> float:
+    """Hit ratio of the `<prefix>.hit` / `<prefix>.miss` counter pair."""
+    hits, misses = _counters[f"{prefix}.hit"], _counters[f"{prefix}.miss"]
+    return round(hits / (hits + misses), 4) if hits + misses else 0.0
+
+
+def snapshot() -> dict:
+    hit_rates = {
+        name[: -len(".hit")]: hit_rate(name[: -len(".hit")])
+        for name in list(_counters)
+        if name.endswith(".hit")
+    }
+    return {
+        "counters": dict(_counters),
+        "hit_rates": hit_rates,
+        "gauges": dict(_gauges),
+        "histograms": {name: h.to_dict() for name, h in _histograms.items()},
+    }
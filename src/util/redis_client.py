@@ -1,98 +1,387 @@
 # redis_client.py
-import json
+import asyncio
+import math
+import random
+import time
+from contextlib import contextmanager
+import orjson
 import redis.asyncio as redis
-from typing import Optional
+from redis.asyncio.client import Pipeline
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import RedisError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+from typing import Any, Dict, List, Optional
+from src.util import metrics
+from src.util.cache import TTLCache
+from src.util.circuit_breaker import CircuitBreaker
 from src.util.config import config
 
 from src.util.log import setup_logger
 logger = setup_logger(__name__, "redis.log")
 
 CACHE_TTL = 60 * 2  # 10 mins
+# seconds an expired value may still be served while it is being refreshed
+STALE_TTL = 60
+# lease on the lock of a key being loaded; other workers wait at most this long
+REFRESH_LOCK_MS = 5000
+LOCK_POLL_INTERVAL = 0.05
+XFETCH_BETA = 1.0
 REDIS_URL = config.redis_url
 
 _redis: Optional[redis.Redis] = None
 
+# values are stored as orjson bytes; with decode_responses they come back as str,
+# which orjson.loads reads just as well
+_dumps = orjson.dumps
+_loads = orjson.loads
+
+
+class RedisUnavailable(RedisConnectionError):
+    """Raised without a round trip while the redis circuit is open."""
+
+
+redis_breaker = CircuitBreaker(
+    "redis",
+    failure_threshold=config.redis_breaker_failure_threshold,
+    reset_timeout=config.redis_breaker_reset_timeout,
+)
+_BREAKER_FAILURES = (RedisConnectionError, RedisTimeoutError, OSError, asyncio.TimeoutError)
+
+# stands in for redis in the cache helpers while it is unreachable; per worker, so
+# an entry can be stale for up to its ttl after another worker's write
+_fallback = TTLCache(maxsize=config.redis_fallback_cache_size, ttl=config.redis_fallback_ttl)
+
+
+async def _guarded(call):
+    if not redis_breaker.allow():
+        raise RedisUnavailable("redis circuit is open")
+    try:
+        result = await call()
+    except _BREAKER_FAILURES:
+        redis_breaker.record_failure()
+        raise
+    redis_breaker.record_success()
+    return result
+
+
+class _BreakerPipeline(Pipeline):
+    async def execute(self, raise_on_error: bool = True):
+        return await _guarded(lambda: super(_BreakerPipeline, self).execute(raise_on_error))
+
+
+class _BreakerRedis(redis.Redis):
+    """Every command and pipeline goes through `redis_breaker`."""
+
+    async def execute_command(self, *args, **options):
+        return await _guarded(lambda: super(_BreakerRedis, self).execute_command(*args, **options))
+
+    def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None) -> Pipeline:
+        return _BreakerPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+@contextmanager
+def _timed(operation: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(f"redis.{operation}", time.perf_counter() - started)
+
+
 async def setup_redis() -> redis.Redis:
     global _redis
     if _redis is None:
         logger.info(f"Initializing Redis connection to {REDIS_URL}")
         try:
-            _redis = redis.from_url(REDIS_URL, decode_responses=True)
+            pool = redis.ConnectionPool.from_url(
+                REDIS_URL,
+                decode_responses=True,
+                max_connections=config.redis_max_connections,
+                health_check_interval=config.redis_health_check_interval,
+                socket_connect_timeout=config.redis_socket_connect_timeout,
+                socket_timeout=config.redis_socket_timeout,
+                socket_keepalive=True,
+                retry_on_timeout=True,
+            )
+            _redis = _BreakerRedis(connection_pool=pool)
             logger.info("Redis connection established successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Redis connection: {str(e)}")
             raise
     return _redis
 
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+        logger.info("Redis connection closed")
+
 async def get_redis() -> redis.Redis:
     if _redis is None:
         logger.error("Redis connection not initialized")
-        raise RuntimeError("Redis has not been initialized. Call setup_redis() first.")
+        # a RedisError, so callers degrade the same way as when redis is down
+        raise RedisUnavailable("Redis has not been initialized. Call setup_redis() first.")
     return _redis
 
 
-async def get_or_fetch_cache(key: str, fetch_callback: callable, ttl: int = CACHE_TTL):
-    redis = await get_redis()
-    logger.debug(f"Attempting to get cached data for key: {key}")
+async def monitor_redis():
+    """Probe redis while its circuit is open, so it closes again without waiting
+    for a request to make the trial call; runs for the life of the app."""
+    while True:
+        await asyncio.sleep(config.redis_breaker_reset_timeout)
+        if redis_breaker.is_open and _redis is not None:
+            try:
+                await _redis.ping()
+                logger.info("Redis is reachable again")
+            except RedisError as e:
+                logger.warning(f"Redis still unavailable: {e}")
+
+
+def clear_local_cache():
+    """Drop this worker's fallback entries, e.g. after a write whose invalidation
+    could not reach redis."""
+    _fallback.clear()
+
+
+async def get_or_fetch_local(key: str, fetch_callback: callable, ttl: int = CACHE_TTL):
+    """get_or_fetch_cache against this worker's fallback cache only."""
+    metrics.incr("cache.fallback")
+    value = _fallback.get(key)
+    if value is None:
+        value = await fetch_callback()
+        _fallback.set(key, value, ttl=min(ttl, config.redis_fallback_ttl))
+    return value
+
+
+class _LeaderGone(Exception):
+    """The request loading a key was cancelled before it finished."""
+
+
+# keys being loaded by this worker -> future of the loaded value, so concurrent
+# misses on one key share a single fetch
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _should_refresh_early(entry: dict, now: float) -> bool:
+    # XFetch: the closer to expiry, and the slower the fetch, the likelier a hit
+    # refreshes the entry ahead of time, so hot keys rarely expire at all
+    return now - entry["d"] * XFETCH_BETA * math.log(1.0 - random.random()) >= entry["e"]
+
+
+async def _acquire_refresh_lock(redis_conn: redis.Redis, key: str) -> bool:
+    with _timed("lock"):
+        return bool(await redis_conn.set(f"lock:{key}", "1", nx=True, px=REFRESH_LOCK_MS))
+
 
-    cached = await redis.get(key)
+async def _load(redis_conn: redis.Redis, key: str, fetch_callback: callable, ttl: int, stale_ttl: int,
+                locked: bool = True):
+    try:
+        started = time.monotonic()
+        fresh = await fetch_callback()
+        delta = time.monotonic() - started
+        entry = {"v": fresh, "d": delta, "e": time.time() + ttl}
+        # kept past its logical expiry so it can be served stale while one caller refreshes it
+        with _timed("set"):
+            await redis_conn.set(key, _dumps(entry), ex=ttl + stale_ttl)
+        return fresh
+    finally:
+        if locked:
+            # the lease may have run out and been taken by another worker meanwhile;
+            # deleting its lock only costs one extra fetch
+            with _timed("delete"):
+                await redis_conn.delete(f"lock:{key}")
+
+
+async def _wait_for_other_worker(redis_conn: redis.Redis, key: str):
+    """Poll for the entry another worker is loading; None when its lease runs out first."""
+    deadline = time.monotonic() + REFRESH_LOCK_MS / 1000
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        with _timed("get"):
+            cached = await redis_conn.get(key)
+        if cached:
+            return _loads(cached)
+    return None
+
+
+async def get_or_fetch_cache(key: str, fetch_callback: callable, ttl: int = CACHE_TTL, stale_ttl: int = STALE_TTL):
+    """Cached value of `key`, calling `fetch_callback` to (re)load it.
+
+    Concurrent misses in this worker share one fetch, and across workers the one
+    holding `lock:{key}` fetches while the others wait for its result. Past `ttl`
+    the value is served stale for up to `stale_ttl` more seconds to everyone but
+    the caller that wins the lock and refreshes it. Without redis, the value is
+    cached in this worker only.
+    """
+    try:
+        return await _get_or_fetch_shared(key, fetch_callback, ttl, stale_ttl)
+    except RedisError as e:
+        # with the circuit open this fails on the first read; a failure mid-way can
+        # cost a second fetch
+        logger.warning(f"Redis unavailable for {key}, using the local cache: {e}")
+        return await get_or_fetch_local(key, fetch_callback, ttl)
+
+
+async def _get_or_fetch_shared(key: str, fetch_callback: callable, ttl: int, stale_ttl: int):
+    redis_conn = await get_redis()
+    with _timed("get"):
+        cached = await redis_conn.get(key)
     if cached:
-        logger.debug(f"Cache hit for key: {key}, value {cached}")
-        return json.loads(cached)
-
-    # fetch fresh data
-    logger.debug("catch miss.....")
-    fresh = await fetch_callback()
-    logger.debug(f"Fetched fresh data: {fresh}")
-
-    # set cache
-    await redis.set(key, json.dumps(fresh), ex=ttl)
-    
-    # verify immediately
-    verify = await redis.get(key)
-    if not verify:
-        logger.error(f"Key {key} failed to write!")
-    else:
-        logger.debug(f"Key {key} written successfully and readable: {verify}")
-
-    return fresh
+        entry = _loads(cached)
+        now = time.time()
+        if entry["e"] > now and not _should_refresh_early(entry, now):
+            metrics.incr("cache.hit")
+            return entry["v"]
+        # stale or picked for early refresh: one caller refreshes, the rest are served
+        # the value they already have
+        if key in _inflight or not await _acquire_refresh_lock(redis_conn, key):
+            metrics.incr("cache.stale" if entry["e"] <= now else "cache.hit")
+            return entry["v"]
+        metrics.incr("cache.refresh")
+        try:
+            return await _load(redis_conn, key, fetch_callback, ttl, stale_ttl)
+        except Exception as e:
+            logger.error(f"Refreshing cache key {key} failed, serving the cached value: {e}")
+            return entry["v"]
+
+    metrics.incr("cache.miss")
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        metrics.incr("cache.coalesced")
+        try:
+            return await asyncio.shield(inflight)
+        except _LeaderGone:
+            return await _get_or_fetch_shared(key, fetch_callback, ttl, stale_ttl)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        if await _acquire_refresh_lock(redis_conn, key):
+            fresh = await _load(redis_conn, key, fetch_callback, ttl, stale_ttl)
+        else:
+            metrics.incr("cache.coalesced")
+            entry = await _wait_for_other_worker(redis_conn, key)
+            if entry:
+                fresh = entry["v"]
+            else:
+                fresh = await _load(redis_conn, key, fetch_callback, ttl, stale_ttl, locked=False)
+        future.set_result(fresh)
+        return fresh
+    except asyncio.CancelledError:
+        future.set_exception(_LeaderGone())
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        del _inflight[key]
+        # waiters re-raise it themselves; don't warn when there were none
+        if future.done() and not future.cancelled():
+            future.exception()
 
 async def set_cache(key: str, data:dict, ttl: int = CACHE_TTL) -> bool:
     """
     Store `data` (JSON-serializable) under `key` with expiration `ttl` seconds.
-    Returns True on success, False on failure.
+    Returns True on success, False on failure (the data is then kept in this
+    worker's fallback cache).
     """
     try:
         redis_conn = await get_redis()
-        payload = json.dumps(data)
-        await redis_conn.set(key, payload, ex=ttl)
-        logger.debug(f"Set cache for key={key} ttl={ttl} payload={payload}")
+        with _timed("set"):
+            await redis_conn.set(key, _dumps(data), ex=ttl)
+        logger.debug(f"Set cache for key={key} ttl={ttl}")
         return True
     except Exception as e:
         logger.error(f"Failed to write cache for key {key}: {e}")
+        _fallback.set(key, data, ttl=min(ttl, config.redis_fallback_ttl))
         return False
 
 async def get_cache(key: str) -> Optional[dict]:
     """
     Retrieve cached data for `key`.
-    Returns the deserialized JSON data if found, None otherwise.
+    Returns the deserialized JSON data if found, None otherwise. Falls back to
+    this worker's cache when redis fails.
     """
     try:
         redis_conn = await get_redis()
-        cached = await redis_conn.get(key)
+        with _timed("get"):
+            cached = await redis_conn.get(key)
         if cached:
-            logger.debug(f"Cache hit for key={key}, value={cached}")
-            return json.loads(cached)
+            logger.debug(f"Cache hit for key={key}")
+            return _loads(cached)
         else:
             logger.debug(f"Cache miss for key={key}")
             return None
     except Exception as e:
         logger.error(f"Failed to get cache for key {key}: {e}")
-        return None
+        return _fallback.get(key)
+
+async def get_many(keys: List[str]) -> List[Any]:
+    """
+    Retrieve several keys in one round trip (MGET).
+    Returns the deserialized values in the order of `keys`, None for each miss.
+    Falls back to this worker's cache when redis fails.
+    """
+    if not keys:
+        return []
+    try:
+        redis_conn = await get_redis()
+        with _timed("mget"):
+            values = await redis_conn.mget(keys)
+    except RedisError as e:
+        logger.error(f"Failed to get {len(keys)} cache keys: {e}")
+        return [_fallback.get(key) for key in keys]
+    return [_loads(value) if value else None for value in values]
+
+async def set_many(items: Dict[str, Any], ttl: int = CACHE_TTL):
+    """
+    Store every key -> value of `items`, each expiring after `ttl` seconds, in one
+    pipelined round trip; in this worker's cache when redis fails.
+    """
+    if not items:
+        return
+    try:
+        redis_conn = await get_redis()
+        with _timed("mset"):
+            async with redis_conn.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, _dumps(value), ex=ttl)
+                await pipe.execute()
+    except RedisError as e:
+        logger.error(f"Failed to write {len(items)} cache keys: {e}")
+        for key, value in items.items():
+            _fallback.set(key, value, ttl=min(ttl, config.redis_fallback_ttl))
 
 async def key_exist(key:str):
     redis = await get_redis()
-    exist = await redis.exists(key)
+    with _timed("exists"):
+        exist = await redis.exists(key)
     if exist:
         return True
-    return False
\ No newline at end of file
+    return False
+async def delete_cache(*keys: str) -> bool:
+    """Remove `keys`. Returns True on success, False on failure."""
+    for key in keys:
+        _fallback.pop(key)
+    try:
+        redis_conn = await get_redis()
+        with _timed("delete"):
+            await redis_conn.delete(*keys)
+        logger.debug(f"Deleted cache keys={keys}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to delete cache keys {keys}: {e}")
+        return False
+
+async def incr_counter(key: str, ttl: int) -> int:
+    """Increment `key` and return the new count; the key expires `ttl` seconds after
+    its first increment."""
+    redis_conn = await get_redis()
+    with _timed("incr"):
+        async with redis_conn.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, ttl, nx=True)
+            count, _ = await pipe.execute()
+    return count
@@ -0,0 +1,150 @@
+"""
+Two-tier read-through cache for small, rarely changing tables.
+
+Each registered dataset is cached whole, as a list of pydantic models plus
+dictionary indexes over it, so a lookup by id or name is a dict hit. The first
+tier is this process; the second is redis, shared by every worker; the loader
+(a select) only runs when both miss.
+
+Writes call `invalidate(name)` after committing. That bumps the dataset's version
+in redis, so the shared copy stops being read (a worker that loaded stale rows
+concurrently stores them under the old version, where nobody looks), and
+publishes the name so every worker drops its local copy. The local TTL bounds
+how long a worker can serve a snapshot if it misses that message.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.util import metrics
+from src.util.log import setup_logger
+from src.util.redis_client import get_redis
+
+logger = setup_logger(__name__, "reference_cache.log")
+
+INVALIDATION_CHANNEL = "ref:invalidate"
+
+
+class Snapshot:
+    """An immutable copy of a dataset and its indexes."""
+
+    def __init__(self, items: List[Any], indexes: Dict[str, Callable[[Any], Hashable]]):
+        self.items = items
+        self._indexes = {name: {key(item): item for item in items} for name, key in indexes.items()}
+
+    def get(self, index: str, value: Hashable) -> Optional[Any]:
+        return self._indexes[index].get(value)
+
+
+@dataclass
+class Dataset:
+    name: str
+    schema: type
+    # builds the select for the rows, which are read as mappings and validated into
+    # `schema`; selecting columns rather than entities skips the ORM entirely
+    query: Callable[[], Any]
+    indexes: Dict[str, Callable[[Any], Hashable]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.adapter = TypeAdapter(List[self.schema])
+
+
+class ReferenceCache:
+    def __init__(self, ttl: int, local_ttl: int):
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._datasets: Dict[str, Dataset] = {}
+        # name -> (expires_at, snapshot)
+        self._local: Dict[str, tuple] = {}
+
+    def register(self, dataset: Dataset):
+        self._datasets[dataset.name] = dataset
+
+    def version_key(self, name: str) -> str:
+        """The redis key of `name`'s version counter, bumped by every invalidation."""
+        return f"refver:{name}"
+
+    async def snapshot(self, db: AsyncSession, name: str) -> Snapshot:
+        entry = self._local.get(name)
+        if entry is not None and entry[0] > time.monotonic():
+            metrics.incr("reference_cache.hit")
+            return entry[1]
+        metrics.incr("reference_cache.miss")
+
+        dataset = self._datasets[name]
+        items = None
+        version = None
+        try:
+            redis = await get_redis()
+            version = await redis.get(self.version_key(name)) or "0"
+            cached = await redis.get(f"ref:{name}:{version}")
+            if cached:
+                items = dataset.adapter.validate_json(cached)
+        except Exception as e:
+            # redis is only the second tier; fall through to the database
+            logger.error(f"reference cache read failed for {name}: {e}")
+
+        if items is None:
+            result = await db.execute(dataset.query())
+            items = dataset.adapter.validate_python(result.mappings().all())
+            if version is not None:
+                try:
+                    redis = await get_redis()
+                    await redis.set(f"ref:{name}:{version}", dataset.adapter.dump_json(items), ex=self.ttl)
+                except Exception as e:
+                    logger.error(f"reference cache write failed for {name}: {e}")
+
+        snapshot = Snapshot(items, dataset.indexes)
+        self._local[name] = (time.monotonic() + self.local_ttl, snapshot)
+        return snapshot
+
+    async def get(self, db: AsyncSession, name: str, index: str, value: Hashable) -> Optional[Any]:
+        return (await self.snapshot(db, name)).get(index, value)
+
+    async def all(self, db: AsyncSession, name: str) -> List[Any]:
+        return (await self.snapshot(db, name)).items
+
+    async def invalidate(self, name: str):
+        """Call after the write has committed."""
+        self._local.pop(name, None)
+        try:
+            redis = await get_redis()
+            await redis.incr(self.version_key(name))
+            await redis.publish(INVALIDATION_CHANNEL, name)
+        except Exception as e:
+            logger.error(f"reference cache invalidation failed for {name}: {e}")
+        logger.info(f"reference data '{name}' invalidated")
+
+    async def warm_up(self, db: AsyncSession):
+        for name in self._datasets:
+            await self.snapshot(db, name)
+        logger.info(f"reference cache warmed: {', '.join(self._datasets)}")
+
+    async def listen(self):
+        """Drop local snapshots other workers invalidate; runs for the life of the app."""
+        reconnecting = False
+        while True:
+            pubsub = None
+            try:
+                redis = await get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                if reconnecting:
+                    # invalidations sent while we were disconnected were missed
+                    self._local.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._local.pop(message["data"], None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"reference cache listener failed, retrying: {e}", exc_info=True)
+                reconnecting = True
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    await pubsub.aclose()
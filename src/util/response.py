@@ -1,15 +1,111 @@
-from typing import Optional, Any
-from fastapi.responses import JSONResponse
+import datetime
+import decimal
+import json
+import uuid
+from typing import Any, AsyncIterator, Callable, Optional
+
+import orjson
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi import HTTPException, status
 from fastapi.encoders import jsonable_encoder
-from src.v1.base.schema import ErrorResponse, SuccessResponse
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+from src.v1.base.schema import ErrorResponse
+
+
+def _default(obj: Any) -> Any:
+    """What orjson can't encode itself, encoded the way jsonable_encoder would."""
+    if isinstance(obj, BaseModel):
+        # pydantic writes the model straight to JSON bytes; orjson splices them in as-is
+        return orjson.Fragment(obj.__pydantic_serializer__.to_json(obj))
+    if isinstance(obj, uuid.UUID):
+        # asyncpg returns its own UUID subclass, which orjson only accepts exactly
+        return str(obj)
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return obj.total_seconds()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson in a single pass over the content.
+
+    Besides what JSONResponse takes, the content may hold pydantic models
+    (serialized by pydantic itself, without a dict in between) and SQLAlchemy rows.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
 
-def success_response(status_code: int = status.HTTP_200_OK, message: str="success", data: Optional[Any] = None):
+
+def success_response(status_code: int = status.HTTP_200_OK, message: str="success", data: Optional[Any] = None, headers: Optional[dict] = None):
     '''Returns a JSON response for success responses'''
-    response_content = SuccessResponse(message=message, data=data)
-    return JSONResponse(status_code=status_code, content=jsonable_encoder(response_content.model_dump()))
+    # the SuccessResponse envelope, written out directly rather than validated,
+    # dumped and walked by jsonable_encoder before being encoded
+    return ORJSONResponse(
+        status_code=status_code,
+        content={"message": message, "data": data, "status": "success"},
+        headers=headers,
+    )
 
 def error_response(status_code: int, message: str, error_code: Optional[str] = None, resolution: Optional[str] = None, data: Optional[Any] = None):
     '''Returns a JSON response for error responses'''
     response_content = ErrorResponse(message=message, error_code=error_code, resolution=resolution, data=data)
     return HTTPException(status_code=status_code, detail=jsonable_encoder(response_content.model_dump()))
+
+
+STREAM_CHUNK_SIZE = 100  # rows per chunk written to the socket
+
+def stream_response(
+    items: AsyncIterator[Any],
+    serialize: Callable[[Any], str],
+    stream_format: str = "json",
+    message: str = "success",
+    status_code: int = status.HTTP_200_OK,
+):
+    '''Returns a streaming response for exports.
+
+    Rows are pulled from `items` (usually a server-side cursor) and written out
+    as they arrive, so memory stays flat regardless of the table size.
+
+    - "ndjson": one serialized row per line.
+    - "json": the usual success envelope, with `data` emitted as a chunked array.
+    '''
+
+    async def ndjson_body():
+        chunk = []
+        async for item in items:
+            chunk.append(serialize(item))
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+    async def json_body():
+        # same key order as success_response: message, data, status
+        yield f'{{"message": {json.dumps(message)}, "data": ['
+        chunk = []
+        first = True
+        async for item in items:
+            chunk.append(serialize(item))
+            if len(chunk) >= STREAM_CHUNK_SIZE:
+                yield ("" if first else ",") + ",".join(chunk)
+                first = False
+                chunk = []
+        if chunk:
+            yield ("" if first else ",") + ",".join(chunk)
+        yield '], "status": "success"}'
+
+    if stream_format == "ndjson":
+        return StreamingResponse(ndjson_body(), status_code=status_code, media_type="application/x-ndjson")
+    return StreamingResponse(json_body(), status_code=status_code, media_type="application/json")
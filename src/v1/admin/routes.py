@@ -1,16 +1,20 @@
 import uuid
-from fastapi import Depends, APIRouter, status
+from fastapi import Depends, APIRouter, Query, status
 
-from src.v1.auth.authorization import RoleCheck
+from src.v1.auth.authorization import RoleCheck, RoleOrApiKeyCheck
+from src.v1.model.api_key import Scope_Enum
 from src.v1.model.user import Role_Enum
-from src.v1.schema.user import UserResponse
-from .schema import Admin, CreateVenue, CreateTimeTable, CreateSemester, CreateDepartment, TimeTableResponse
-from src.v1.controllers.util import get_admin_service, get_current_user, get_venue_service, get_semester_service, get_timetable_service
+from src.v1.schema.profiles import ADMIN, API_KEY, SEMESTER, TIMETABLE, VENUE
+from .schema import Admin, ApiKeyResponse, CreateApiKey, CreatedApiKey, CreateVenue, CreateTimeTable, CreateSemester, CreateDepartment, TimeTableResponse
+from src.v1.controllers.util import get_admin_service, get_api_key_service, get_current_user, get_venue_service, get_semester_service, get_timetable_service, sparse_fieldset
 from .service import AdminService
 from src.v1.service.venue_service import VenueService
 from src.v1.service.semester_service import SemesterService
 from src.v1.service.timetable_service import TimeTableService
-from src.util.response import success_response
+from src.v1.service.api_key_service import ApiKeyService
+from src.util import metrics
+from src.util.response import stream_response, success_response
+from src.util.serializer import ResponseProfile
 from src.v1.schema.courses import CreateCourse
 from src.v1.schema.user import CreateUser, CreateStudent
 admin_router = APIRouter(prefix="/admin")
@@ -25,29 +29,27 @@ role=Depends(RoleCheck([Role_Enum.ADMIN]))
     new_venue = await venue_service.create_venue(data)
     return success_response(
         status_code=status.HTTP_201_CREATED,
-        data = CreateVenue.model_validate(new_venue).model_dump()
+        data = VENUE.dump(new_venue)
     )
 
 @admin_router.get("/venue", tags=["Venues"])
 async def fetch_all_venue(venue_service: VenueService = Depends(get_venue_service),
-user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
+caller=Depends(RoleOrApiKeyCheck([Role_Enum.ADMIN, Role_Enum.LECTURER], Scope_Enum.VENUE_READ))
 ):
     venues = await venue_service.fetch_all_venues()
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = [CreateVenue.model_validate(venue).model_dump() for venue in venues]
+        data = VENUE.dump_many(venues)
     )
 @admin_router.get("/venue/{venue_id}", tags=["Venues"])
 async def fetch_one_venue(venue_id: uuid.UUID,
 venue_service: VenueService = Depends(get_venue_service),
-user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
+caller=Depends(RoleOrApiKeyCheck([Role_Enum.ADMIN, Role_Enum.LECTURER], Scope_Enum.VENUE_READ))
 ):
     venue = await venue_service.fetch_venue_by_id(venue_id)
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = CreateVenue.model_validate(venue).model_dump()
+        data = VENUE.dump(venue)
     )
 
 @admin_router.put("/venue/{venue_id}", tags=["Venues"])
@@ -58,7 +60,7 @@ role=Depends(RoleCheck([Role_Enum.ADMIN]))
     updated_venue = await venue_service.update_venue(venue_id, data)
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = CreateVenue.model_validate(updated_venue).model_dump()
+        data = VENUE.dump(updated_venue)
     )
 
 @admin_router.delete("/venue/{venue_id}", tags=["Venues"])
@@ -83,30 +85,28 @@ role=Depends(RoleCheck([Role_Enum.ADMIN]))
     new_semester = await semester_service.create_semester(data)
     return success_response(
         status_code=status.HTTP_201_CREATED,
-        data = CreateSemester.model_validate(new_semester).model_dump()
+        data = SEMESTER.dump(new_semester)
     )
 
 @admin_router.get("/semester", tags=["Semesters"])
 async def fetch_all_semesters(semester_service: SemesterService = Depends(get_semester_service),
-user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
+caller=Depends(RoleOrApiKeyCheck([Role_Enum.ADMIN, Role_Enum.LECTURER], Scope_Enum.SEMESTER_READ))
 ):
     semesters = await semester_service.fetch_all_semesters()
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = [CreateSemester.model_validate(semester).model_dump() for semester in semesters]
+        data = SEMESTER.dump_many(semesters)
     )
 
 @admin_router.get("/semester/{semester_id}", tags=["Semesters"])
 async def fetch_one_semester(semester_id: uuid.UUID,
 semester_service: SemesterService = Depends(get_semester_service),
-user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
+caller=Depends(RoleOrApiKeyCheck([Role_Enum.ADMIN, Role_Enum.LECTURER], Scope_Enum.SEMESTER_READ))
 ):
     semester = await semester_service.fetch_semester_by_id(semester_id)
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = CreateSemester.model_validate(semester).model_dump()
+        data = SEMESTER.dump(semester)
     )
 
 @admin_router.put("/semester/{semester_id}", tags=["Semesters"])
@@ -117,7 +117,7 @@ role=Depends(RoleCheck([Role_Enum.ADMIN]))
     updated_semester = await semester_service.update_semester(semester_id, data)
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = CreateSemester.model_validate(updated_semester).model_dump()
+        data = SEMESTER.dump(updated_semester)
     )
 
 @admin_router.delete("/semester/{semester_id}", tags=["Semesters"])
@@ -141,30 +141,43 @@ role=Depends(RoleCheck([Role_Enum.ADMIN]))
     new_timetable = await timetable_service.create_timetable(data)
     return success_response(
         status_code=status.HTTP_201_CREATED,
-        data = TimeTableResponse.model_validate(new_timetable).model_dump()
+        data = TIMETABLE.dump(new_timetable)
     )
 
 @admin_router.get("/timetable", tags=["Timetables"])
 async def fetch_all_timetables(timetable_service: TimeTableService = Depends(get_timetable_service),
-user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
+caller=Depends(RoleOrApiKeyCheck([Role_Enum.ADMIN, Role_Enum.LECTURER], Scope_Enum.TIMETABLE_READ)),
+profile: ResponseProfile = Depends(sparse_fieldset(TIMETABLE)),
 ):
-    timetables = await timetable_service.fetch_all_timetables()
+    timetables = await timetable_service.fetch_all_timetables(profile.fields)
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = [TimeTableResponse.model_validate(timetable).model_dump() for timetable in timetables]
+        data = profile.dump_many(timetables)
+    )
+
+@admin_router.get("/timetable/export", tags=["Timetables"])
+async def export_all_timetables(
+stream_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+timetable_service: TimeTableService = Depends(get_timetable_service),
+user=Depends(get_current_user),
+role=Depends(RoleCheck([Role_Enum.ADMIN]))
+):
+    return stream_response(
+        timetable_service.stream_all_timetables(),
+        serialize=lambda timetable: TimeTableResponse.model_validate(timetable).model_dump_json(),
+        stream_format=stream_format,
     )
 
 @admin_router.get("/timetable/{timetable_id}", tags=["Timetables"])
 async def fetch_one_timetable(timetable_id: uuid.UUID,
 timetable_service: TimeTableService = Depends(get_timetable_service),
-user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
+caller=Depends(RoleOrApiKeyCheck([Role_Enum.ADMIN, Role_Enum.LECTURER], Scope_Enum.TIMETABLE_READ)),
+profile: ResponseProfile = Depends(sparse_fieldset(TIMETABLE)),
 ):
     timetable = await timetable_service.fetch_timetable_by_id(timetable_id)
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = TimeTableResponse.model_validate(timetable).model_dump()
+        data = profile.dump(timetable)
     )
 
 @admin_router.put("/timetable/{timetable_id}", tags=["Timetables"])
@@ -175,7 +188,7 @@ role=Depends(RoleCheck([Role_Enum.ADMIN]))
     updated_timetable = await timetable_service.update_timetable(timetable_id, data)
     return success_response(
         status_code=status.HTTP_200_OK,
-        data = TimeTableResponse.model_validate(updated_timetable).model_dump()
+        data = TIMETABLE.dump(updated_timetable)
     )
 
 @admin_router.delete("/timetable/{timetable_id}", tags=["Timetables"])
@@ -197,9 +210,54 @@ async def admin_register(
 ):
     # user_data.role = Role_Enum.ADMIN.value
     new_user = await user_service.create_admin(user_data)
-    validated_data = Admin.model_validate(new_user).model_dump(exclude="password")
     return success_response(
         message="Admin Created Successfully",
         status_code=status.HTTP_201_CREATED,
-        data=validated_data,
+        data=ADMIN.dump(new_user),
+    )
+
+
+@admin_router.get("/metrics", tags=["Admin"])
+async def fetch_metrics(user=Depends(get_current_user),
+role=Depends(RoleCheck([Role_Enum.ADMIN]))
+):
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        data=metrics.snapshot()
+    )
+
+
+#API keys for machine clients
+@admin_router.post("/api-keys", tags=["API Keys"])
+async def create_api_key(data: CreateApiKey, api_key_service: ApiKeyService = Depends(get_api_key_service),
+user=Depends(get_current_user),
+role=Depends(RoleCheck([Role_Enum.ADMIN]))
+):
+    api_key, key = await api_key_service.create_api_key(data, created_by_id=user.id)
+    return success_response(
+        message="API key created; store it now, it won't be shown again",
+        status_code=status.HTTP_201_CREATED,
+        data=CreatedApiKey(**ApiKeyResponse.model_validate(api_key).model_dump(), key=key).model_dump()
+    )
+
+@admin_router.get("/api-keys", tags=["API Keys"])
+async def fetch_all_api_keys(api_key_service: ApiKeyService = Depends(get_api_key_service),
+user=Depends(get_current_user),
+role=Depends(RoleCheck([Role_Enum.ADMIN]))
+):
+    api_keys = await api_key_service.fetch_all_api_keys()
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        data=API_KEY.dump_many(api_keys)
+    )
+
+@admin_router.delete("/api-keys/{api_key_id}", tags=["API Keys"])
+async def revoke_api_key(api_key_id: uuid.UUID, api_key_service: ApiKeyService = Depends(get_api_key_service),
+user=Depends(get_current_user),
+role=Depends(RoleCheck([Role_Enum.ADMIN]))
+):
+    await api_key_service.revoke_api_key(api_key_id)
+    return success_response(
+        status_code=status.HTTP_200_OK,
+        message="API key revoked"
     )
@@ -6,6 +6,7 @@ from dateutil.rrule import rrule, rrulestr, DAILY, WEEKLY, MONTHLY, YEARLY
 
 from src.v1.model.user import Role_Enum
 from src.v1.model.timetable import Semester_Enum
+from src.v1.model.api_key import Scope_Enum
 
 class Admin(BaseModel):
     email:EmailStr
@@ -16,6 +17,29 @@ class Admin(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
     
+class CreateApiKey(BaseModel):
+    name: str
+    scopes: List[Scope_Enum] = Field(min_length=1)
+    # requests per minute; the configured default when omitted
+    rate_limit_per_minute: Optional[int] = Field(default=None, gt=0)
+
+
+class ApiKeyResponse(BaseModel):
+    id: uuid.UUID
+    name: str
+    prefix: str
+    scopes: List[Scope_Enum]
+    rate_limit_per_minute: int
+    created_at: Optional[datetime] = None
+    revoked_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CreatedApiKey(ApiKeyResponse):
+    # the only time the key is returned
+    key: str
+
 class CreateVenue(BaseModel):
     name:str
     id: Optional[uuid.UUID] = None
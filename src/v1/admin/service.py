@@ -1,9 +1,9 @@
-from sqlalchemy import func, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.util.db import insert_returning
 from src.util.log import setup_logger
-from src.v1.auth.service import password_hash
+from src.v1.auth.service import password_hash_async
 from src.v1.base.exception import (
     AlreadyExistsError,
     ServerError,
@@ -23,30 +23,26 @@ class AdminService:
         try:
             logger.info(f"Attempting to create admin with email: {user_data.email}")
 
-            # Check if user exists by email
+            # Hash the password
+            hashed_password = await password_hash_async(user_data.password, Role_Enum.ADMIN)
+
+            # Create new admin user unless the email is taken
             stmt = await self.db.execute(
-                select(User).where(func.lower(User.email) == user_data.email.lower())
+                insert_returning(
+                    User,
+                    email=user_data.email,
+                    password=hashed_password,
+                    role=Role_Enum.ADMIN,
+                )
             )
-            existing_user = stmt.scalar_one_or_none()
-            if existing_user:
+            new_admin = stmt.scalar_one_or_none()
+            if not new_admin:
                 logger.warning(f"User with email '{user_data.email}' already exists.")
                 raise AlreadyExistsError(
                     f"User with email '{user_data.email}' already exists"
                 )
 
-            # Hash the password
-            hashed_password = password_hash(user_data.password)
-
-            # Create new admin user
-            new_admin = User(
-                email=user_data.email,
-                password=hashed_password,
-                role=Role_Enum.ADMIN,
-            )
-
-            self.db.add(new_admin)
             await self.db.commit()
-            await self.db.refresh(new_admin)
             logger.info(
                 f"Admin {new_admin.email} created successfully with id {new_admin.id}."
             )
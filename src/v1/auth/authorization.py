@@ -1,7 +1,12 @@
-from typing import List
-from fastapi import Depends
-from src.v1.model.user import User
-from src.v1.controllers.util import get_current_user
+from typing import List, Optional
+from fastapi import Depends, Request, Security
+from fastapi.security import APIKeyHeader
+from src.v1.auth.schema import Principal
+from src.v1.auth.service import AccessTokenBearer
+from src.v1.controllers.util import get_api_key_service, get_current_user, get_user_service
+from src.v1.model.api_key import Scope_Enum
+from src.v1.service.api_key_service import ApiKeyService
+from src.v1.service.user import UserService
 from src.util.exception import AuthorizationError
 from src.util.log import setup_logger
 
@@ -11,7 +16,7 @@ class RoleCheck():
     def __init__(self, required_roles = List[str]):
         self.required_roles = required_roles
     
-    def __call__(self, current_user: "User" = Depends(get_current_user)):
+    def __call__(self, current_user: Principal = Depends(get_current_user)):
         logger.info(f"Role check for user {current_user.id} with roles {current_user.role} against required roles {self.required_roles}")
         user_roles_list = [current_user.role] if isinstance(current_user.role, str) else current_user.role
         
@@ -33,4 +38,37 @@ class RoleCheck():
         if isinstance(required_roles, str):
             required_roles = [required_roles]
             
-        return bool (set(user_role) & set(required_roles))
\ No newline at end of file
+        return bool (set(user_role) & set(required_roles))
+
+
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+access_token_bearer = AccessTokenBearer()
+
+
+class RoleOrApiKeyCheck(RoleCheck):
+    """RoleCheck for read endpoints machine clients may call too: a request carrying
+    X-API-Key is authorized by the key's scopes instead of a user's role, without a
+    token or a user lookup."""
+
+    def __init__(self, required_roles: List[str], scope: Scope_Enum):
+        super().__init__(required_roles)
+        self.scope = scope
+
+    async def __call__(
+        self,
+        request: Request,
+        api_key: Optional[str] = Security(api_key_header),
+        user_service: UserService = Depends(get_user_service),
+        api_key_service: ApiKeyService = Depends(get_api_key_service),
+    ):
+        if api_key:
+            principal = await api_key_service.authenticate(api_key)
+            if self.scope not in principal.scopes:
+                logger.warning(f"Access denied for API key {principal.id}: required scope {self.scope}")
+                raise AuthorizationError()
+            return principal
+
+        token_data = await access_token_bearer(request)
+        current_user = await get_current_user(request, token_data, user_service)
+        super().__call__(current_user)
+        return current_user
@@ -0,0 +1,101 @@
+"""
+JWT signing keys.
+
+HS* algorithms sign and verify with the shared JWT_SECRET_KEY. For asymmetric
+algorithms (RS*, PS*, ES*, EdDSA) tokens are signed with the PEM private key in
+JWT_PRIVATE_KEY_FILE and carry its `kid`; its public half, plus the retired keys
+in JWT_PREVIOUS_PUBLIC_KEY_FILES, is published at /.well-known/jwks.json so a
+gateway or another service can verify access tokens without calling this API.
+
+To rotate: add the current key's public PEM to JWT_PREVIOUS_PUBLIC_KEY_FILES, point
+JWT_PRIVATE_KEY_FILE at the new key and restart. Remove the old public key once
+REFRESH_TOKEN_EXPIRY has passed and no token it signed can still be valid.
+"""
+import base64
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional
+
+import jwt
+from jwt.algorithms import get_default_algorithms
+
+from src.util.config import config
+from src.util.log import setup_logger
+
+logger = setup_logger(__name__, "auth_keys.log")
+
+# members of each key type that make up its RFC 7638 thumbprint
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y"), "OKP": ("crv", "kty", "x")}
+
+
+def jwk_thumbprint(jwk: dict) -> str:
+    members = {name: jwk[name] for name in _THUMBPRINT_MEMBERS[jwk["kty"]]}
+    digest = hashlib.sha256(json.dumps(members, separators=(",", ":"), sort_keys=True).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class KeyRing:
+    def __init__(
+        self,
+        algorithm: str,
+        secret: Optional[str] = None,
+        private_key_file: Optional[str] = None,
+        previous_public_key_files: tuple = (),
+    ):
+        self.algorithm = algorithm
+        self.kid = None
+        # verification keys by kid, so a token's key is found without parsing PEMs
+        self._verification_keys = {}
+        self._jwks = []
+
+        if algorithm.startswith("HS"):
+            if not secret:
+                raise ValueError(f"{algorithm} needs JWT_SECRET_KEY")
+            self.signing_key = secret
+            return
+
+        self._algo = get_default_algorithms()[algorithm]
+        if not private_key_file:
+            raise ValueError(f"{algorithm} needs JWT_PRIVATE_KEY_FILE")
+        self.signing_key = self._algo.prepare_key(Path(private_key_file).read_bytes())
+        self.kid = self._add(self.signing_key.public_key())
+        for path in previous_public_key_files:
+            self._add(self._algo.prepare_key(Path(path).read_bytes()))
+        logger.info(f"signing {algorithm} tokens with key {self.kid}, {len(self._jwks)} key(s) published")
+
+    @classmethod
+    def from_config(cls) -> "KeyRing":
+        return cls(
+            config.jwt_algo,
+            secret=config.jwt_secret_key,
+            private_key_file=config.jwt_private_key_file,
+            previous_public_key_files=config.jwt_previous_public_key_files,
+        )
+
+    def _add(self, public_key) -> str:
+        jwk = self._algo.to_jwk(public_key, as_dict=True)
+        kid = jwk_thumbprint(jwk)
+        jwk.update(kid=kid, alg=self.algorithm, use="sig")
+        self._verification_keys[kid] = public_key
+        self._jwks.append(jwk)
+        return kid
+
+    @property
+    def headers(self) -> Optional[dict]:
+        return {"kid": self.kid} if self.kid else None
+
+    def verification_key(self, token: str):
+        if self.kid is None:
+            return self.signing_key
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._verification_keys.get(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"token signed with unknown key {kid}")
+        return key
+
+    def jwks(self) -> dict:
+        return {"keys": self._jwks}
+
+
+key_ring = KeyRing.from_config()
@@ -0,0 +1,167 @@
+"""
+Revoked-token tracking.
+
+A revoked jti is stored in redis as `revoked:{jti}` until the token would have
+expired anyway, and announced on a pub/sub channel. Every worker mirrors the set
+into a bloom filter, so the common case -- a token that was never revoked -- is
+answered without a round-trip, and redis is only asked when the filter says maybe.
+
+Workers also keep the exact set (jti -> expiry) they last saw, which answers in
+redis' place while it is unreachable; revocations made meanwhile are applied
+locally and written to redis once it is back.
+"""
+import asyncio
+import math
+import time
+
+from src.util import metrics
+from src.util.bloom import BloomFilter
+from src.util.config import config
+from src.util.log import setup_logger
+from redis.exceptions import RedisError
+
+from src.util.redis_client import get_redis, key_exist
+
+logger = setup_logger(__name__, "revocation.log")
+
+REVOKED_PREFIX = "revoked:"
+REVOCATION_CHANNEL = "auth:revoked"
+
+_filter = BloomFilter(config.revocation_filter_capacity)
+# a filter miss is only trusted while this worker is subscribed and has loaded the set;
+# otherwise every check goes to redis
+_in_sync = False
+# jti -> expiry (epoch seconds) of every revocation this worker knows of
+_revoked = {}
+# (jti, exp) revoked while redis was unreachable, written once it is back
+_pending = []
+
+
+def _revoked_key(jti: str) -> str:
+    return f"{REVOKED_PREFIX}{jti}"
+
+
+def _remember(jti: str, exp: float):
+    _filter.add(jti)
+    _revoked[jti] = exp
+
+
+async def _publish_revocation(jti: str, exp: float):
+    ttl = max(1, math.ceil(exp - time.time()))
+    redis = await get_redis()
+    # the value is the expiry, so workers loading the set know when to forget it
+    await redis.set(_revoked_key(jti), str(exp), ex=ttl)
+    await redis.publish(REVOCATION_CHANNEL, f"{jti} {exp}")
+    logger.info(f"token {jti} revoked for {ttl}s")
+
+
+async def revoke_token(jti: str, exp: float):
+    """Revoke `jti` until `exp`, the token's own expiry (epoch seconds)."""
+    _remember(jti, exp)
+    try:
+        await _publish_revocation(jti, exp)
+    except RedisError as e:
+        # only this worker knows until redis is back
+        logger.error(f"redis unavailable, token {jti} revoked in this worker only for now: {e}")
+        _pending.append((jti, exp))
+
+
+def _revoked_locally(jti: str) -> bool:
+    exp = _revoked.get(jti)
+    return exp is not None and exp > time.time()
+
+
+async def is_revoked(jti: str) -> bool:
+    # revocation_filter.hit means the filter could not rule the jti out and redis was asked
+    if _in_sync and jti not in _filter:
+        metrics.incr("revocation_filter.miss")
+        return False
+    metrics.incr("revocation_filter.hit")
+    try:
+        # a revocation still waiting to be written to redis is only known locally
+        return await key_exist(_revoked_key(jti)) or _revoked_locally(jti)
+    except RedisError as e:
+        metrics.incr("revocation.local_fallback")
+        logger.warning(f"redis unavailable, checking revocation of {jti} locally: {e}")
+        return _revoked_locally(jti)
+
+
+async def _flush_pending():
+    while _pending:
+        jti, exp = _pending[0]
+        if exp > time.time():
+            await _publish_revocation(jti, exp)
+        _pending.pop(0)
+
+
+def _parse_expiry(value: str) -> float:
+    # keys written before the expiry was stored hold "", and live at most as long as a
+    # refresh token
+    return float(value) if value else time.time() + config.refresh_token_expiry
+
+
+async def _load_revocations():
+    """A fresh filter and jti -> expiry map of everything revoked in redis."""
+    redis = await get_redis()
+    fresh = BloomFilter(config.revocation_filter_capacity)
+    revoked = {}
+    keys = [key async for key in redis.scan_iter(match=f"{REVOKED_PREFIX}*", count=1000)]
+    for start in range(0, len(keys), 1000):
+        batch = keys[start:start + 1000]
+        for key, value in zip(batch, await redis.mget(batch)):
+            if value is None:
+                continue  # expired since the scan
+            jti = key[len(REVOKED_PREFIX):]
+            fresh.add(jti)
+            revoked[jti] = _parse_expiry(value)
+    if fresh.count > config.revocation_filter_capacity:
+        logger.warning(
+            f"{fresh.count} revoked tokens exceed the filter capacity of "
+            f"{config.revocation_filter_capacity}; more checks will reach redis"
+        )
+    metrics.set_gauge("revocation_filter.size", fresh.count)
+    return fresh, revoked
+
+
+async def sync_revocations():
+    """Keep this worker's filter in step with redis; runs for the life of the app.
+
+    The filter is rebuilt from a SCAN every `revocation_filter_rebuild_interval`
+    seconds, since expired jtis can't be removed from a bloom filter."""
+    global _filter, _revoked, _in_sync
+    while True:
+        pubsub = None
+        try:
+            redis = await get_redis()
+            pubsub = redis.pubsub()
+            # subscribe before loading, so nothing revoked during the load is missed
+            await pubsub.subscribe(REVOCATION_CHANNEL)
+            await _flush_pending()
+            _filter, _revoked = await _load_revocations()
+            _in_sync = True
+            logger.info(f"revocation filter loaded with {_filter.count} tokens")
+
+            rebuild_at = time.monotonic() + config.revocation_filter_rebuild_interval
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    jti, _, exp = message["data"].partition(" ")
+                    _remember(jti, _parse_expiry(exp))
+                if _pending:
+                    # redis failed while the subscription held up
+                    await _flush_pending()
+                if time.monotonic() >= rebuild_at:
+                    # announcements received meanwhile wait in the subscription and
+                    # land in the new filter
+                    _filter, _revoked = await _load_revocations()
+                    rebuild_at = time.monotonic() + config.revocation_filter_rebuild_interval
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"revocation sync failed, retrying: {e}", exc_info=True)
+            _in_sync = False
+            await asyncio.sleep(1)
+        finally:
+            _in_sync = False
+            if pubsub is not None:
+                await pubsub.aclose()
@@ -1,9 +1,9 @@
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, status
+from fastapi.responses import JSONResponse
 
 from src.util.config import config
-from src.util.redis_client import set_cache
 from src.util.response import success_response
 from src.v1.auth.authorization import RoleCheck
 from src.v1.controllers.util import get_current_user, get_user_service
@@ -11,10 +11,14 @@ from src.v1.model.user import Role_Enum
 from src.v1.schema.user import CreateStudent, CreateUser, UserResponse
 from src.v1.service.user import UserService
 
+from . import revocation
+from .keys import key_ring
 from .schema import Login
 from .service import AccessTokenBearer, RefreshTokenBearer, auth_service
 
 auth_router = APIRouter(prefix="/auth")
+# served from the root, where JWKS consumers look for it
+jwks_router = APIRouter()
 
 
 @auth_router.post("/lecturer-register", tags=["Authentication"])
@@ -89,7 +93,9 @@ async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer(
 
 @auth_router.get("/me", tags=["Authentication"])
 async def current_user(
-    user=Depends(get_current_user)):
+    principal=Depends(get_current_user),
+    user_service: UserService = Depends(get_user_service)):
+    user = await user_service.check_if_user_exist_by_id(principal.id)
     validated_data = UserResponse.model_validate(user).model_dump()
     return success_response(
         message="User Fetched Successfully",
@@ -100,8 +106,13 @@ async def current_user(
 
 @auth_router.get("/logout", tags=["Authentication"])
 async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
-    jti = token_details["jti"]
-    await set_cache(key=str(jti), data="")
+    await revocation.revoke_token(token_details["jti"], token_details["exp"])
     return success_response(
         message="Logged Out Successfully", status_code=status.HTTP_200_OK, data=None
     )
+
+
+@jwks_router.get("/.well-known/jwks.json", tags=["Authentication"])
+async def jwks():
+    # plain JWKS document, not the usual response envelope, so verifiers can consume it as is
+    return JSONResponse(key_ring.jwks(), headers={"Cache-Control": "public, max-age=300"})
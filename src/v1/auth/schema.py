@@ -2,6 +2,10 @@ from datetime import datetime
 from typing import Any, Dict, Optional
 from pydantic import  BaseModel, ConfigDict, EmailStr, field_validator, ValidationError, model_validator
 import uuid
+
+from src.v1.model.user import Role_Enum
+from src.v1.model.api_key import Scope_Enum
+
 class Login(BaseModel):
     email: Optional[EmailStr] = None
     school_id: Optional[str] = None
@@ -22,3 +26,23 @@ class Token(BaseModel):
     exp: datetime
     jti: str 
     refresh: bool
+
+
+class Principal(BaseModel):
+    """What authorization needs to know about the caller; cached per user id."""
+    id: uuid.UUID
+    role: Role_Enum
+    level_id: Optional[uuid.UUID] = None
+    department_id: Optional[uuid.UUID] = None
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class ApiKeyPrincipal(BaseModel):
+    """A verified API key; cached per key hash."""
+    id: uuid.UUID
+    name: str
+    scopes: frozenset[Scope_Enum]
+    rate_limit_per_minute: int
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
@@ -1,3 +1,7 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import uuid
 from passlib.context import CryptContext
@@ -9,15 +13,46 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from src.v1.base.exception import InvalidToken
 from src.util.log import setup_logger
 from .schema import Token
-from src.util.redis_client import key_exist, set_cache
+from .keys import key_ring
+from .revocation import is_revoked
+from src.util.redis_client import set_cache
+from src.util import metrics
+from src.util.cache import TTLCache
 logger = setup_logger(__name__, "auth_service.log")
 
-ctx = CryptContext(
-    schemes=["bcrypt"]
-)
+PASSWORD_SCHEMES = ("bcrypt", "argon2", "scrypt")
+
+
+def build_crypt_context(scheme: str = None, rounds: int = None, role_rounds: dict = None) -> CryptContext:
+    """Hashing policy from config: `scheme` hashes new passwords, the other schemes are
+    still verified but deprecated, and when a cost is set it is also the minimum, so
+    weaker hashes report `needs_update`. Per-role costs are passlib categories."""
+    scheme = scheme or config.password_scheme
+    rounds = rounds if rounds is not None else config.password_hash_rounds
+    role_rounds = config.password_role_rounds if role_rounds is None else role_rounds
+
+    settings = {}
+    if rounds is not None:
+        settings[f"{scheme}__default_rounds"] = rounds
+        settings[f"{scheme}__min_rounds"] = rounds
+    for role, cost in role_rounds.items():
+        settings[f"{role}__{scheme}__default_rounds"] = cost
+        settings[f"{role}__{scheme}__min_rounds"] = cost
+    if scheme == "argon2" and config.argon2_memory_cost is not None:
+        settings["argon2__memory_cost"] = config.argon2_memory_cost
 
-def password_hash(password:str)->str:
-    hash = ctx.hash(password)
+    return CryptContext(
+        schemes=[scheme] + [s for s in PASSWORD_SCHEMES if s != scheme],
+        default=scheme,
+        deprecated="auto",
+        **settings,
+    )
+
+
+ctx = build_crypt_context()
+
+def password_hash(password:str, role:str=None)->str:
+    hash = ctx.hash(password, category=role)
     return hash 
 
 
@@ -25,6 +60,53 @@ def verify_password(password, password_hash):
     is_valid = ctx.verify(password, password_hash)
     return is_valid 
 
+
+def verify_and_update_password(password, password_hash, role:str=None):
+    """(is_valid, new_hash); new_hash is set when the stored hash no longer meets the policy"""
+    return ctx.verify_and_update(password, password_hash, category=role)
+
+
+# a hash takes ~250ms of CPU per call and releases the GIL, so it runs in a bounded
+# thread pool; the semaphore caps concurrent hashes and anything beyond it queues up
+_hash_executor = ThreadPoolExecutor(
+    max_workers=config.password_hash_workers, thread_name_prefix="password-hash"
+)
+_hash_slots = asyncio.Semaphore(config.password_hash_workers)
+_hash_queue_depth = 0
+
+
+async def _run_in_hash_pool(func, *args):
+    global _hash_queue_depth
+    _hash_queue_depth += 1
+    metrics.set_gauge("password_hash.queue_depth", _hash_queue_depth)
+    try:
+        await _hash_slots.acquire()
+    finally:
+        _hash_queue_depth -= 1
+        metrics.set_gauge("password_hash.queue_depth", _hash_queue_depth)
+
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_slots.release()
+        metrics.observe("password_hash.duration", time.perf_counter() - started)
+
+
+async def password_hash_async(password: str, role: str = None) -> str:
+    """password_hash without blocking the event loop."""
+    return await _run_in_hash_pool(password_hash, password, role)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    """verify_password without blocking the event loop."""
+    return await _run_in_hash_pool(verify_password, password, password_hash)
+
+
+async def verify_and_update_password_async(password: str, password_hash: str, role: str = None):
+    """verify_and_update_password without blocking the event loop."""
+    return await _run_in_hash_pool(verify_and_update_password, password, password_hash, role)
+
 class AuthService():
     """this class handles in-app authentication (jwt access token, refresh token)
     """
@@ -49,8 +131,9 @@ class AuthService():
             
             token = jwt.encode(
                 payload=payload,
-                key=config.jwt_secret_key,
-                algorithm=config.jwt_algo
+                key=key_ring.signing_key,
+                algorithm=key_ring.algorithm,
+                headers=key_ring.headers,
             )
             logger.info(f"token created for user: {user_data.get('id')}")
             return token
@@ -62,8 +145,8 @@ class AuthService():
         try:
             token_data = jwt.decode(
                 jwt=token,
-                key=config.jwt_secret_key,
-                algorithms=[config.jwt_algo]
+                key=key_ring.verification_key(token),
+                algorithms=[key_ring.algorithm]
             )
             logger.info(f"token decoded successfully for user: {token_data.get('user').get('id')}")
             return token_data
@@ -81,6 +164,27 @@ class AuthService():
 
 auth_service = AuthService()
 
+# claims of tokens that already passed signature verification, keyed by the token's
+# sha256 and dropped at its exp; lookups never await, so tasks can't interleave on it
+_verified_tokens = TTLCache(maxsize=config.token_cache_size, ttl=config.access_token_expiry)
+
+
+def decode_token_cached(token: str) -> dict:
+    """auth_service.decode_token, skipped for a token that was verified before.
+    The returned claims are shared between requests and must not be mutated."""
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = _verified_tokens.get(key)
+    if token_data is not None:
+        metrics.incr("token_cache.hit")
+        return token_data
+
+    metrics.incr("token_cache.miss")
+    token_data = auth_service.decode_token(token)
+    remaining = token_data["exp"] - time.time()
+    if remaining > 0:
+        _verified_tokens.set(key, token_data, ttl=remaining)
+    return token_data
+
 
 
 class TokenService(HTTPBearer):
@@ -127,19 +231,24 @@ class TokenService(HTTPBearer):
         # if not self.token_valid(token):
         #     raise InvalidToken("Invalid or expired token")
 
-        # Step 3: Decode token
-        try:
-            token_data = auth_service.decode_token(token)
-        except Exception as e:
-            logger.error(f"an error occurred during decoding token: {e}")
-            raise InvalidToken("Invalid or expired token")
-
-        if not token_data:
-            raise InvalidToken("No data found in token")
-
-        #check if token in block list 
-        if await key_exist(key=token_data["jti"]):
-            raise InvalidToken("Token has been revoked, get new token") 
+        batch = getattr(request.state, "batch", None)
+        if batch is not None and token == batch.token:
+            # a /batch sub-request: the batch request verified this token already
+            token_data = batch.token_data
+        else:
+            # Step 3: Decode token
+            try:
+                token_data = decode_token_cached(token)
+            except Exception as e:
+                logger.error(f"an error occurred during decoding token: {e}")
+                raise InvalidToken("Invalid or expired token")
+
+            if not token_data:
+                raise InvalidToken("No data found in token")
+
+            #check if token in block list 
+            if await is_revoked(token_data["jti"]):
+                raise InvalidToken("Token has been revoked, get new token") 
         # Allow child to validate token type (access or refresh)
         self.verify_token_type(token_data)
         
@@ -58,3 +58,13 @@ class NotActive(BaseExceptionClass):
 class AuthorizationError(BaseExceptionClass):
     pass
 
+class RateLimitExceeded(BaseExceptionClass):
+    pass
+
+
+class NotModified(BaseExceptionClass):
+    """Not an error: ends a conditional GET with 304 and these response headers."""
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+        super().__init__("Not modified")
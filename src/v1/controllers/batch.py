@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.security.utils import get_authorization_scheme_param
+
+from src.util.batch import run_batch
+from src.util.log import setup_logger
+from src.util.response import success_response
+from src.v1.auth.schema import Principal
+from src.v1.schema.batch import BatchRequest
+
+from .util import access_token_bearer, get_current_user
+
+logger = setup_logger(__name__, "batch_route.log")
+
+batch_router = APIRouter()
+
+
+@batch_router.post("/batch", tags=["Batch"])
+async def batch(
+    data: BatchRequest,
+    request: Request,
+    token_data: dict = Depends(access_token_bearer),
+    principal: Principal = Depends(get_current_user),
+):
+    """Run several GET requests in one round trip, e.g. everything an app loads on
+    start-up. Each is authorized as if sent on its own with this request's token;
+    `data` maps each id to that request's status, ETag headers and JSON body."""
+    _, token = get_authorization_scheme_param(request.headers.get("authorization"))
+    responses = await run_batch(request.app, request.scope, data.requests, token, token_data, principal)
+    return success_response(status_code=status.HTTP_200_OK, data=responses)
@@ -1,23 +1,24 @@
 import uuid
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, status
 
+from src.util.cache_aside import tag_key
+from src.util.etag import conditional_get
 from src.util.log import setup_logger
 from src.util.response import success_response
+from src.util.serializer import ResponseProfile
 from src.v1.auth.service import AccessTokenBearer
-from src.v1.schema.courses import (
-    CourseResponse,
-    CreateCourse,
-    DeptResponse,
-    LevelResponse,
-)
-from src.v1.schema.user import UserCourse, UserResponse
+from src.v1.schema.courses import CreateCourse
+from src.v1.schema.profiles import COURSE, DEPARTMENT, LEVEL, USER
+from src.v1.schema.user import UserCourse
 from src.v1.service.courses import CourseService, DeptService
 from src.v1.service.level_service import LevelService
-from src.v1.auth.authorization import RoleCheck
+from src.v1.service.reference_data import DEPARTMENTS, LEVELS, reference_cache
+from src.v1.auth.authorization import RoleCheck, RoleOrApiKeyCheck
+from src.v1.model.api_key import Scope_Enum
 from src.v1.model.user import Role_Enum
 
-from .util import get_course_service, get_current_user, get_dept_service, get_level_service, get_admin_service
+from .util import get_course_service, get_current_user, get_dept_service, get_level_service, get_admin_service, sparse_fieldset
 
 logger = setup_logger(__name__, "courses_route.log")
 
@@ -26,51 +27,27 @@ courses_router = APIRouter()
 
 
 @courses_router.get("/levels")
-async def fetch_levels(level_service: LevelService = Depends(get_level_service)):
+async def fetch_levels(request: Request, level_service: LevelService = Depends(get_level_service)):
+    headers = await conditional_get(request, [reference_cache.version_key(LEVELS)])
     levels = await level_service.fetch_all_level()
-    # logger.info(levels)
-    lev = []
-    for level in levels:
-        # logger.info(f"loop: {level}")
-        level_value = LevelResponse.model_validate(level).model_dump()
-        # logger.info(level_value)
-        lev.append(level_value)
-    return success_response(status_code=status.HTTP_200_OK, data=lev)
+    return success_response(status_code=status.HTTP_200_OK, data=LEVEL.dump_many(levels), headers=headers)
 
 
 @courses_router.get("/departments")
-async def fetch_all_department(dept_service: DeptService = Depends(get_dept_service)):
+async def fetch_all_department(request: Request, dept_service: DeptService = Depends(get_dept_service)):
+    headers = await conditional_get(request, [reference_cache.version_key(DEPARTMENTS)])
     departments = await dept_service.fetch_all_dept()
-    dept = []
-
-    for department in departments:
-        dept_value = DeptResponse.model_validate(department).model_dump()
-        dept.append(dept_value)
-
-    return success_response(status_code=status.HTTP_200_OK, data=dept)
+    return success_response(status_code=status.HTTP_200_OK, data=DEPARTMENT.dump_many(departments), headers=headers)
 
 
 @courses_router.get("/departments/courses")
 async def fetch_all_course_in_a_department(
     dept_id: uuid.UUID = Query(...),
     dept_service: DeptService = Depends(get_dept_service),
+    profile: ResponseProfile = Depends(sparse_fieldset(COURSE)),
 ):
-    dept = []
-    departments = await dept_service.fetch_all_courses_for_a_dept(dept_id)
-    if not departments:
-        dept = []
-
-    for department in departments:
-        # return department.to_dict()
-        dept_value = CourseResponse.model_validate(department).model_dump(
-            exclude={
-                "level": {"created_at", "updated_at"},
-                "department": {"created_at", "updated_at"},
-            }
-        )
-        dept.append(dept_value)
-
-    return success_response(status_code=status.HTTP_200_OK, data=dept)
+    courses = await dept_service.fetch_all_courses_for_a_dept(dept_id)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(courses))
 
 
 @courses_router.post("/course")
@@ -82,14 +59,7 @@ async def create_course(
     
 ):
     new_course = await course_service.create_course(course_data)
-    # return new_course.to_dict()
-    course = CourseResponse.model_validate(new_course).model_dump(
-        exclude={
-            "level": {"created_at", "updated_at"},
-            "department": {"created_at", "updated_at"},
-        }
-    )
-    return success_response(status_code=status.HTTP_201_CREATED, data=course)
+    return success_response(status_code=status.HTTP_201_CREATED, data=COURSE.dump(new_course))
 
 
 @courses_router.get("/course/student/{course_id}")
@@ -98,19 +68,14 @@ async def fetch_all_student_taking_course(
     course_id: uuid.UUID,
     course_service: CourseService = Depends(get_course_service),
     user=Depends(get_current_user),
+    profile: ResponseProfile = Depends(sparse_fieldset(USER)),
 ):
     validated_data = UserCourse.model_validate(
         {"user_id": user.id, "course_id": course_id}
     )
     logger.debug(f"request body: {validated_data.course_id}, {validated_data.user_id}")
-    students = await course_service.fetch_all_student_taking_course(validated_data)
-    user_list = []
-    for student in students:
-        # logger.info(f"loop: {level}")
-        user_value = UserResponse.model_validate(student).model_dump(exclude="password")
-        # logger.info(level_value)
-        user_list.append(user_value)
-    return success_response(status_code=status.HTTP_200_OK, data=user_list)
+    students = await course_service.fetch_all_student_taking_course(validated_data, profile.fields, profile.relations)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(students))
 
 
 @courses_router.get("/course/lecturers/{course_id}")
@@ -118,48 +83,32 @@ async def fetch_all_lecturers_taking_course(
     course_id: uuid.UUID,
     course_service: CourseService = Depends(get_course_service),
     user=Depends(get_current_user),
+    profile: ResponseProfile = Depends(sparse_fieldset(USER)),
 ):
     logger.debug(f"Fetching lecturers for course: {course_id}")
-    lecturers = await course_service.fetch_all_lecturers_taking_course(course_id)
-    user_list = []
-    for lecturer in lecturers:
-        user_value = UserResponse.model_validate(lecturer).model_dump(exclude="password")
-        user_list.append(user_value)
-    return success_response(status_code=status.HTTP_200_OK, data=user_list)
+    lecturers = await course_service.fetch_all_lecturers_taking_course(course_id, profile.fields, profile.relations)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(lecturers))
 
 
 # CRUD for courses
 @courses_router.get("/course", tags=["Courses"])
-async def fetch_all_courses(course_service: CourseService = Depends(get_course_service),
-user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
+async def fetch_all_courses(request: Request, course_service: CourseService = Depends(get_course_service),
+caller=Depends(RoleOrApiKeyCheck([Role_Enum.ADMIN, Role_Enum.LECTURER], Scope_Enum.COURSE_READ)),
+profile: ResponseProfile = Depends(sparse_fieldset(COURSE)),
 ):
+    headers = await conditional_get(request, [tag_key("courses")])
+    # the whole list is cached once for every fieldset, so a hit runs no SQL to prune
     courses = await course_service.fetch_all_courses()
-    course_list = []
-    for course in courses:
-        course_value = CourseResponse.model_validate(course).model_dump(
-            exclude={
-                "level": {"created_at", "updated_at"},
-                "department": {"created_at", "updated_at"},
-            }
-        )
-        course_list.append(course_value)
-    return success_response(status_code=status.HTTP_200_OK, data=course_list)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(courses), headers=headers)
 
 @courses_router.get("/course/{course_id}", tags=["Courses"])
 async def fetch_one_course(course_id: uuid.UUID,
 course_service: CourseService = Depends(get_course_service),
-user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
+caller=Depends(RoleOrApiKeyCheck([Role_Enum.ADMIN, Role_Enum.LECTURER], Scope_Enum.COURSE_READ)),
+profile: ResponseProfile = Depends(sparse_fieldset(COURSE)),
 ):
     course = await course_service.check_if_course_exists_by_id(course_id)
-    course_value = CourseResponse.model_validate(course).model_dump(
-        exclude={
-            "level": {"created_at", "updated_at"},
-            "department": {"created_at", "updated_at"},
-        }
-    )
-    return success_response(status_code=status.HTTP_200_OK, data=course_value)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump(course))
 
 @courses_router.put("/course/{course_id}", tags=["Courses"])
 async def update_course(course_id: uuid.UUID, data: CreateCourse,
@@ -168,13 +117,7 @@ user=Depends(get_current_user),
 role=Depends(RoleCheck([Role_Enum.ADMIN]))
 ):
     updated_course = await course_service.update_course(course_id, data)
-    course_value = CourseResponse.model_validate(updated_course).model_dump(
-        exclude={
-            "level": {"created_at", "updated_at"},
-            "department": {"created_at", "updated_at"},
-        }
-    )
-    return success_response(status_code=status.HTTP_200_OK, data=course_value)
+    return success_response(status_code=status.HTTP_200_OK, data=COURSE.dump(updated_course))
 
 @courses_router.delete("/course/{course_id}", tags=["Courses"])
 async def delete_course(course_id: uuid.UUID,
@@ -195,8 +138,7 @@ user=Depends(get_current_user),
 role=Depends(RoleCheck([Role_Enum.ADMIN]))
 ):
     new_dept = await dept_service.create_dept(data["name"])
-    dept_value = DeptResponse.model_validate(new_dept).model_dump()
-    return success_response(status_code=status.HTTP_201_CREATED, data=dept_value)
+    return success_response(status_code=status.HTTP_201_CREATED, data=DEPARTMENT.dump(new_dept))
 
 @courses_router.get("/department/{dept_id}", tags=["Departments"])
 async def fetch_one_department(dept_id: uuid.UUID,
@@ -205,8 +147,7 @@ user=Depends(get_current_user),
 role=Depends(RoleCheck([Role_Enum.ADMIN, Role_Enum.LECTURER]))
 ):
     dept = await dept_service.check_if_dept_exist_by_id(dept_id)
-    dept_value = DeptResponse.model_validate(dept).model_dump()
-    return success_response(status_code=status.HTTP_200_OK, data=dept_value)
+    return success_response(status_code=status.HTTP_200_OK, data=DEPARTMENT.dump(dept))
 
 @courses_router.put("/department/{dept_id}", tags=["Departments"])
 async def update_department(dept_id: uuid.UUID, data: dict,
@@ -215,8 +156,7 @@ user=Depends(get_current_user),
 role=Depends(RoleCheck([Role_Enum.ADMIN]))
 ):
     updated_dept = await dept_service.update_dept(dept_id, data["name"])
-    dept_value = DeptResponse.model_validate(updated_dept).model_dump()
-    return success_response(status_code=status.HTTP_200_OK, data=dept_value)
+    return success_response(status_code=status.HTTP_200_OK, data=DEPARTMENT.dump(updated_dept))
 
 @courses_router.delete("/department/{dept_id}", tags=["Departments"])
 async def delete_department(dept_id: uuid.UUID,
@@ -1,19 +1,23 @@
-from fastapi import APIRouter, Depends, status
+from datetime import date
+
+from fastapi import APIRouter, Depends, Query, Request, status
 from pydantic import EmailStr
 
+from src.util.cache_aside import tag_key
+from src.util.etag import conditional_get
 from src.util.log import setup_logger
-from src.util.response import success_response
+from src.util.response import stream_response, success_response
+from src.util.serializer import ResponseProfile
 from src.v1.auth.service import AccessTokenBearer
 from src.v1.schema.user import UserCourse, UserResponse, CreateUser, CreateStudent
-from src.v1.schema.courses import CourseResponse
+from src.v1.schema.profiles import COURSE, LECTURER_TIMETABLE, STUDENT_TIMETABLE, USER
 from src.v1.service.user import UserService
 from src.v1.service.student_service import StudentService
 from src.v1.service.lecturer_service import LecturerService
 from src.v1.auth.authorization import RoleCheck
 from src.v1.model.user import Role_Enum
-from src.v1.schema.timetable import StudentTimeTableResponse, LecturerTimeTableResponse
 
-from .util import get_user_service, get_student_service, get_lecturer_service, get_current_user
+from .util import get_user_service, get_student_service, get_lecturer_service, get_current_user, sparse_fieldset
 
 logger = setup_logger(__name__, "user_route.log")
 
@@ -26,110 +30,120 @@ user_router = APIRouter()
 
 @user_router.get("/students/timetable", tags=["Students"])
 async def fetch_student_timetable(
+    request: Request,
     student_service: StudentService = Depends(get_student_service),
     current_user=Depends(get_current_user),
-    role=Depends(RoleCheck([Role_Enum.STUDENT]))
+    role=Depends(RoleCheck([Role_Enum.STUDENT])),
+    profile: ResponseProfile = Depends(sparse_fieldset(STUDENT_TIMETABLE)),
 ):
+    # the schedule lists upcoming classes, so it also changes with the date
+    headers = await conditional_get(
+        request,
+        [tag_key("courses"), tag_key("timetables")],
+        current_user.id, current_user.level_id, current_user.department_id, date.today(),
+    )
     timetables = await student_service.fetch_student_timetable(str(current_user.id))
-    timetable_list = []
-    for timetable in timetables:
-        timetable_value = StudentTimeTableResponse.model_validate(timetable).model_dump()
-        timetable_list.append(timetable_value)
-    return success_response(status_code=status.HTTP_200_OK, data=timetable_list)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(timetables), headers=headers)
 
 
 @user_router.get("/lecturers/timetable", tags=["Lecturers"])
 async def fetch_lecturer_timetable(
+    request: Request,
     lecturer_service: LecturerService = Depends(get_lecturer_service),
     current_user=Depends(get_current_user),
-    role=Depends(RoleCheck([Role_Enum.LECTURER]))
+    role=Depends(RoleCheck([Role_Enum.LECTURER])),
+    profile: ResponseProfile = Depends(sparse_fieldset(LECTURER_TIMETABLE)),
 ):
+    headers = await conditional_get(
+        request,
+        [tag_key("courses"), tag_key("timetables"), tag_key(f"lecturer:{current_user.id}")],
+        current_user.id, date.today(),
+    )
     timetables = await lecturer_service.fetch_lecturer_timetable(str(current_user.id))
-    timetable_list = []
-    for timetable in timetables:
-        timetable_value = LecturerTimeTableResponse.model_validate(timetable).model_dump(  exclude={
-                "level": {"created_at", "updated_at"},
-                "department": {"created_at", "updated_at"},
-            })
-        timetable_list.append(timetable_value)
-    return success_response(status_code=status.HTTP_200_OK, data=timetable_list)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(timetables), headers=headers)
 
 
 @user_router.get("/lecturers/courses", tags=["Lecturers"])
 async def fetch_lecturer_courses(
     lecturer_service: LecturerService = Depends(get_lecturer_service),
     current_user=Depends(get_current_user),
-    role=Depends(RoleCheck([Role_Enum.LECTURER]))
+    role=Depends(RoleCheck([Role_Enum.LECTURER])),
+    profile: ResponseProfile = Depends(sparse_fieldset(COURSE)),
 ):
     courses = await lecturer_service.fetch_lecturer_courses(str(current_user.id))
-    course_list = []
-    for course in courses:
-        course_value = CourseResponse.model_validate(course).model_dump( exclude={
-                "level": {"created_at", "updated_at"},
-                "department": {"created_at", "updated_at"},
-            })
-        course_list.append(course_value)
-    return success_response(status_code=status.HTTP_200_OK, data=course_list)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(courses))
 
 
 @user_router.get("/lecturers", tags=["Lecturers"])
-async def fetch_all_lecturers(user_service: UserService = Depends(get_user_service)):
-    users = await user_service.fetch_all_lecturers()
-    user_list = []
-    for user in users:
-        # logger.info(f"loop: {level}")
-        user_value = UserResponse.model_validate(user).model_dump(exclude="password")
-        # logger.info(level_value)
-        user_list.append(user_value)
-    return success_response(status_code=status.HTTP_200_OK, data=user_list)
+async def fetch_all_lecturers(
+    user_service: UserService = Depends(get_user_service),
+    profile: ResponseProfile = Depends(sparse_fieldset(USER)),
+):
+    users = await user_service.fetch_all_lecturers(profile.fields, profile.relations)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(users))
 
 
 @user_router.get("/students", tags=["Students"])
-async def fetch_all_students(user_service: UserService = Depends(get_user_service)):
-    users = await user_service.fetch_all_students()
-    user_list = []
-    for user in users:
-        # logger.info(f"loop: {level}")
-        user_value = UserResponse.model_validate(user).model_dump(exclude="password")
-        # logger.info(level_value)
-        user_list.append(user_value)
-    return success_response(status_code=status.HTTP_200_OK, data=user_list)
+async def fetch_all_students(
+    user_service: UserService = Depends(get_user_service),
+    profile: ResponseProfile = Depends(sparse_fieldset(USER)),
+):
+    users = await user_service.fetch_all_students(profile.fields, profile.relations)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(users))
 
 
 @user_router.get("/lecturers/{email}", tags=["Lecturers"])
 async def fetch_lecturer_by_email(
-    email: EmailStr, user_service: UserService = Depends(get_user_service)
+    email: EmailStr,
+    user_service: UserService = Depends(get_user_service),
+    profile: ResponseProfile = Depends(sparse_fieldset(USER)),
 ):
     user = await user_service.check_if_user_exist_by_email(email)
-    validated_data = UserResponse.model_validate(user).model_dump(exclude="password")
-    return success_response(status_code=status.HTTP_201_CREATED, data=validated_data)
+    return success_response(status_code=status.HTTP_201_CREATED, data=profile.dump(user))
 
 
 @user_router.get("/lecturers/{school_id}", tags=["Lecturers"])
 async def fetch_lecturer_by_school_id(
-    school_id: str, user_service: UserService = Depends(get_user_service)
+    school_id: str,
+    user_service: UserService = Depends(get_user_service),
+    profile: ResponseProfile = Depends(sparse_fieldset(USER)),
 ):
     user = await user_service.check_if_user_exist_by_school_id(school_id)
-    validated_data = UserResponse.model_validate(user).model_dump(exclude="password")
-    return success_response(status_code=status.HTTP_200_OK, data=validated_data)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump(user))
+
+
+@user_router.get("/students/export", tags=["Students"])
+async def export_all_students(
+    stream_format: str = Query("json", alias="format", pattern="^(json|ndjson)$"),
+    user_service: UserService = Depends(get_user_service),
+    user=Depends(get_current_user),
+    role=Depends(RoleCheck([Role_Enum.ADMIN]))
+):
+    return stream_response(
+        user_service.stream_all_students(),
+        serialize=lambda student: UserResponse.model_validate(student).model_dump_json(),
+        stream_format=stream_format,
+    )
 
 
 @user_router.get("/students/{email}", tags=["Students"])
 async def fetch_student_by_email(
-    email: EmailStr, user_service: UserService = Depends(get_user_service)
+    email: EmailStr,
+    user_service: UserService = Depends(get_user_service),
+    profile: ResponseProfile = Depends(sparse_fieldset(USER)),
 ):
     user = await user_service.check_if_user_exist_by_email(email)
-    validated_data = UserResponse.model_validate(user).model_dump(exclude="password")
-    return success_response(status_code=status.HTTP_200_OK, data=validated_data)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump(user))
 
 
 @user_router.get("/students/{school_id}", tags=["Students"])
 async def fetch_student_by_school_id(
-    school_id: str, user_service: UserService = Depends(get_user_service)
+    school_id: str,
+    user_service: UserService = Depends(get_user_service),
+    profile: ResponseProfile = Depends(sparse_fieldset(USER)),
 ):
     user = await user_service.check_if_user_exist_by_school_id(school_id)
-    validated_data = UserResponse.model_validate(user).model_dump(exclude="password")
-    return success_response(status_code=status.HTTP_200_OK, data=validated_data)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump(user))
 
 
 @user_router.post("/lecturers/courses", tags=["Lecturers"])
@@ -158,30 +172,26 @@ user=Depends(get_current_user),
 role=Depends(RoleCheck([Role_Enum.ADMIN]))
 ):
     new_user = await user_service.create_user(data)
-    user_value = UserResponse.model_validate(new_user).model_dump(exclude="password")
-    return success_response(status_code=status.HTTP_201_CREATED, data=user_value)
+    return success_response(status_code=status.HTTP_201_CREATED, data=USER.dump(new_user))
 
 @user_router.get("/user", tags=["Users"])
 async def fetch_all_users(user_service: UserService = Depends(get_user_service),
 user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN]))
+role=Depends(RoleCheck([Role_Enum.ADMIN])),
+profile: ResponseProfile = Depends(sparse_fieldset(USER)),
 ):
-    users = await user_service.fetch_all_users()
-    user_list = []
-    for u in users:
-        user_value = UserResponse.model_validate(u).model_dump(exclude="password")
-        user_list.append(user_value)
-    return success_response(status_code=status.HTTP_200_OK, data=user_list)
+    users = await user_service.fetch_all_users(profile.fields, profile.relations)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump_many(users))
 
 @user_router.get("/user/{user_id}", tags=["Users"])
 async def fetch_one_user(user_id: str,
 user_service: UserService = Depends(get_user_service),
 user=Depends(get_current_user),
-role=Depends(RoleCheck([Role_Enum.ADMIN]))
+role=Depends(RoleCheck([Role_Enum.ADMIN])),
+profile: ResponseProfile = Depends(sparse_fieldset(USER)),
 ):
     u = await user_service.check_if_user_exist_by_id(user_id)
-    user_value = UserResponse.model_validate(u).model_dump(exclude="password")
-    return success_response(status_code=status.HTTP_200_OK, data=user_value)
+    return success_response(status_code=status.HTTP_200_OK, data=profile.dump(u))
 
 @user_router.put("/user/{user_id}", tags=["Users"])
 async def update_user(user_id: str, data: CreateUser | CreateStudent,
@@ -190,8 +200,7 @@ user=Depends(get_current_user),
 role=Depends(RoleCheck([Role_Enum.ADMIN]))
 ):
     updated_user = await user_service.update_user(user_id, data)
-    user_value = UserResponse.model_validate(updated_user).model_dump(exclude="password")
-    return success_response(status_code=status.HTTP_200_OK, data=user_value)
+    return success_response(status_code=status.HTTP_200_OK, data=USER.dump(updated_user))
 
 @user_router.delete("/user/{user_id}", tags=["Users"])
 async def delete_user(user_id: str,
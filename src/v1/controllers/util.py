@@ -1,9 +1,13 @@
 #shared servicde Dependency
 
-from fastapi import Depends
+from typing import Optional
+
+from fastapi import Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.util.db import get_session
 from src.v1.auth.service import AccessTokenBearer
+from src.util.serializer import ResponseProfile
+from src.v1.base.exception import BadRequest, InvalidToken
 from src.v1.service.courses import CourseService, DeptService
 from src.v1.service.level_service import LevelService
 from src.v1.service.user import UserService
@@ -13,49 +17,93 @@ from src.v1.admin.service import AdminService
 from src.v1.service.venue_service import VenueService
 from src.v1.service.semester_service import SemesterService
 from src.v1.service.timetable_service import TimeTableService
+from src.v1.service.api_key_service import ApiKeyService
+from src.v1.service.loaders import Loaders
+from src.v1.service.container import ServiceContainer
+
+async def get_services(db: AsyncSession = Depends(get_session)):
+    """The request's services, built on first use and shared by every dependency
+    and service that asks for one (see src/v1/service/container.py)."""
+    return ServiceContainer(db)
+
+async def get_loaders(services: ServiceContainer = Depends(get_services)) -> Loaders:
+    """The request's batched, memoized entity lookups, shared by every service it uses."""
+    return services.loaders
+
+async def get_course_service(services: ServiceContainer = Depends(get_services)) -> CourseService:
+    return services.courses
+
+async def get_level_service(services: ServiceContainer = Depends(get_services)) -> LevelService:
+    return services.levels
+
+async def get_admin_service(services: ServiceContainer = Depends(get_services)) -> AdminService:
+    return services.admins
+
+async def get_venue_service(services: ServiceContainer = Depends(get_services)) -> VenueService:
+    return services.venues
+
+async def get_semester_service(services: ServiceContainer = Depends(get_services)) -> SemesterService:
+    return services.semesters
+
+
+async def get_api_key_service(services: ServiceContainer = Depends(get_services)) -> ApiKeyService:
+    return services.api_keys
+
+
+async def get_dept_service(services: ServiceContainer = Depends(get_services)) -> DeptService:
+    return services.departments
 
-async def get_course_service(db: AsyncSession = Depends(get_session)):
-    return CourseService(db=db)
+async def get_user_service(services: ServiceContainer = Depends(get_services)) -> UserService:
+    return services.users
 
-async def get_level_service(db: AsyncSession = Depends(get_session)):
-    return LevelService(db=db)
+async def get_student_service(services: ServiceContainer = Depends(get_services)) -> StudentService:
+    return services.students
 
-async def get_admin_service(db: AsyncSession = Depends(get_session)):
-    return AdminService(db=db)
+async def get_lecturer_service(services: ServiceContainer = Depends(get_services)) -> LecturerService:
+    return services.lecturers
 
-async def get_venue_service(db: AsyncSession = Depends(get_session)):
-    return VenueService(db=db)
+async def get_timetable_service(services: ServiceContainer = Depends(get_services)) -> TimeTableService:
+    return services.timetables
 
-async def get_semester_service(db: AsyncSession = Depends(get_session)):
-    return SemesterService(db=db)
+def _names(value: Optional[str]):
+    return None if value is None else [name.strip() for name in value.split(",") if name.strip()]
 
-async def get_timetable_service(db: AsyncSession = Depends(get_session),
-                               venue_service: VenueService = Depends(get_venue_service),
-                               course_service: CourseService = Depends(get_course_service),
-                               semester_service: SemesterService = Depends(get_semester_service)):
-    return TimeTableService(db=db, venue_service=venue_service, course_service=course_service, semester_service=semester_service)
 
-async def get_dept_service(db: AsyncSession = Depends(get_session)):
-    return DeptService(db=db)
+def sparse_fieldset(profile: ResponseProfile):
+    """Dependency giving `profile` cut down to the request's `fields` and `include`
+    query parameters (comma separated names), or the whole profile without them."""
 
-async def get_user_service(db: AsyncSession = Depends(get_session)):
-    return UserService(db=db)
+    def dependency(
+        fields: Optional[str] = Query(None, description=f"Only these fields, of: {', '.join(profile.fields)}"),
+        include: Optional[str] = Query(
+            None,
+            description=f"Embed these, of: {', '.join(profile.relations)}" if profile.relations else "Nothing to embed",
+        ),
+    ) -> ResponseProfile:
+        try:
+            return profile.fieldset(_names(fields), _names(include))
+        except ValueError as e:
+            raise BadRequest(str(e))
 
-async def get_student_service(db: AsyncSession = Depends(get_session)):
-    return StudentService(db=db)
+    return dependency
 
-async def get_lecturer_service(db: AsyncSession = Depends(get_session),
-                              course_service: CourseService = Depends(get_course_service),
-                              user_service: UserService = Depends(get_user_service)):
-    return LecturerService(db=db, course_service=course_service, user_service=user_service)
+access_token_bearer = AccessTokenBearer()
 
 def get_access_token():
     access_token_bearer = AccessTokenBearer()
     return access_token_bearer
 
-async def get_current_user(user_details:dict = Depends(AccessTokenBearer()),
+async def get_current_user(request: Request, user_details:dict = Depends(access_token_bearer),
 user_service: UserService = Depends(get_user_service)
 ):
+    """The caller's cached Principal (id, role, level_id, department_id), not the full
+    User; handlers that need more load it through the user service."""
+    batch = getattr(request.state, "batch", None)
+    if batch is not None and user_details is batch.token_data:
+        # a /batch sub-request, made by the principal the batch resolved
+        return batch.principal
     user_id = user_details["user"]["user_id"]
-    user = await user_service.check_if_user_exist_by_id(user_id)
-    return user
+    principal = await user_service.get_principal(user_id)
+    if principal is None:
+        raise InvalidToken("User no longer exists")
+    return principal
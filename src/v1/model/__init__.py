@@ -1,3 +1,4 @@
+from .api_key import ApiKey, Scope_Enum
 from .timetable import Course, Department, TimeTable, TimeTableException, Venue, Semester
 from .user import Level, Level_Enum, Role_Enum, User
 
@@ -12,4 +13,6 @@ __all__ = [
     "TimeTable",
     "Venue",
     "Semester",
+    "ApiKey",
+    "Scope_Enum",
 ]
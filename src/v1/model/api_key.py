@@ -0,0 +1,31 @@
+import uuid
+from datetime import datetime
+from enum import StrEnum
+from typing import List, Optional
+
+from sqlalchemy import DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.v1.base.model import BaseModel
+
+
+class Scope_Enum(StrEnum):
+    TIMETABLE_READ = "timetable:read"
+    VENUE_READ = "venue:read"
+    SEMESTER_READ = "semester:read"
+    COURSE_READ = "course:read"
+
+
+class ApiKey(BaseModel):
+    """Credential for machine clients (venue displays, the SIS sync job) on read endpoints."""
+
+    name: Mapped[str] = mapped_column(String, nullable=False)
+    # HMAC-SHA256 of the key; the key itself is only shown once, when it is created
+    key_hash: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    # leading characters of the key, so admins can tell keys apart
+    prefix: Mapped[str] = mapped_column(String(16), nullable=False)
+    scopes: Mapped[List[str]] = mapped_column(ARRAY(String), nullable=False)
+    rate_limit_per_minute: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_by_id: Mapped[Optional[uuid.UUID]] = mapped_column(ForeignKey("users.id"), nullable=True)
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
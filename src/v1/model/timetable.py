@@ -2,7 +2,7 @@ import uuid
 from datetime import date, datetime, time
 from enum import StrEnum
 
-from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, func
 from sqlalchemy import Date as SqlDate
 from sqlalchemy import Time as SqlTime
 from sqlalchemy import DateTime as SQLdatetime
@@ -22,6 +22,11 @@ class Department(BaseModel):
 
 
 class Course(BaseModel):
+    __table_args__ = (
+        # serves both `department_id = ?` and `department_id = ? AND level_id = ?`
+        Index("ix_courses_department_id_level_id", "department_id", "level_id"),
+    )
+
     name: Mapped[str] = mapped_column(String, nullable=False)
     code: Mapped[str] = mapped_column(String, nullable=False, unique=True)
     department_id: Mapped[uuid.UUID] = mapped_column(
@@ -42,21 +47,26 @@ class Venue(BaseModel):
 
 
 class Semester(BaseModel):
+    __table_args__ = (
+        # semesters are looked up by (school_session, name); the index also serves school_session alone
+        Index("uq_semesters_school_session_name", "school_session", "name", unique=True),
+    )
+
     name: Mapped[Semester_Enum] = mapped_column(
         SqlEnum(Semester_Enum, name="semester_enum"), nullable=False
     )
-    school_session: Mapped[str] = mapped_column(String, nullable=False, unique=True, index=True)
+    school_session: Mapped[str] = mapped_column(String, nullable=False)
     start_date: Mapped[date] = mapped_column(SqlDate, nullable=False)
     end_date: Mapped[date] = mapped_column(SqlDate, nullable=False)
 
 
 class TimeTable(BaseModel):
     course_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("courses.id"), nullable=False
+        ForeignKey("courses.id"), nullable=False, index=True
     )
-    venue_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("venues.id"), nullable=False)
+    venue_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("venues.id"), nullable=False, index=True)
     semester_id: Mapped[uuid.UUID] = mapped_column(
-        ForeignKey("semesters.id"), nullable=False
+        ForeignKey("semesters.id"), nullable=False, index=True
     )
     start_time: Mapped[time] = mapped_column(
         SqlTime, nullable=False
@@ -75,6 +85,9 @@ class TimeTable(BaseModel):
 
 
 class TimeTableException(BaseModel):
+    __table_args__ = (
+        Index("ix_time_table_exceptions_schedule_id_is_cancelled", "schedule_id", "is_cancelled"),
+    )
 
     orginal_date: Mapped[datetime] = mapped_column(
         SQLdatetime(timezone=True), nullable=False
@@ -107,3 +120,11 @@ class TimeTableException(BaseModel):
     user: Mapped["Venue"] = relationship(
         "User", backref=backref("schedule_exception"), lazy="joined"
     )
+
+
+# case-insensitive identity lookups compare lower(column) = lower(value); these
+# expression indexes serve them and keep names unique regardless of case
+Index("uq_departments_name_lower", func.lower(Department.name), unique=True)
+Index("uq_courses_code_lower", func.lower(Course.code), unique=True)
+Index("uq_courses_name_lower", func.lower(Course.name), unique=True)
+Index("uq_venues_name_lower", func.lower(Venue.name), unique=True)
@@ -4,7 +4,7 @@ from src.v1.base.model import BaseModel
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, String,  Enum as SqlEnum, Integer, Table, Column
+from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, String,  Enum as SqlEnum, Integer, Table, Column, Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship, backref
 from sqlalchemy.dialects.postgresql import UUID
 from enum import StrEnum, IntEnum
@@ -15,7 +15,9 @@ from enum import StrEnum, IntEnum
 user_course_association = Table('user_course', BaseModel.metadata,
     Column('user_id', UUID(as_uuid=True), ForeignKey('users.id'), primary_key=True),
     Column('course_id', UUID(as_uuid=True), ForeignKey('courses.id'), primary_key=True),
-    Column('registered_at', DateTime(timezone=True), default=datetime.now(timezone.utc))
+    Column('registered_at', DateTime(timezone=True), default=datetime.now(timezone.utc)),
+    # the primary key leads with user_id; lecturer lookups go the other way round
+    Index('ix_user_course_course_id_user_id', 'course_id', 'user_id'),
 )
 
 
@@ -33,6 +35,11 @@ class Level_Enum(IntEnum):
 
 
 class User(BaseModel):
+    __table_args__ = (
+        # role listings, optionally narrowed to a level and/or department
+        Index("ix_users_role_level_id_department_id", "role", "level_id", "department_id"),
+    )
+
     email: Mapped[str] = mapped_column(String, unique=True, nullable=True, index=True)
     first_name: Mapped[str] = mapped_column(String, nullable=True)
     last_name: Mapped[str] = mapped_column(String, nullable=True) 
@@ -64,5 +71,14 @@ class User(BaseModel):
     #     pass
 
 class Level(BaseModel):
+    __table_args__ = (
+        Index("uq_levels_name", "name", unique=True),
+    )
+
     name: Mapped[Level_Enum] = mapped_column(
         SqlEnum(Level_Enum, name="level_enum"),  nullable=False)
+
+
+# login and signup match email/school_id case-insensitively: lower(column) = lower(value)
+Index("uq_users_email_lower", func.lower(User.email), unique=True)
+Index("uq_users_school_id_lower", func.lower(User.school_id), unique=True)
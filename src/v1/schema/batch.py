@@ -0,0 +1,35 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+from src.util.config import Settings, config
+
+BATCH_PATH = f"{Settings.API_PREFIX}/batch"
+
+
+class BatchItem(BaseModel):
+    # the key this sub-request's response is returned under
+    id: str = Field(min_length=1, max_length=64)
+    # an API path, with its query string if any, e.g. /api/v1/course?fields=code
+    path: str
+    # an ETag the client holds for this path; a current one gets a 304 entry
+    if_none_match: Optional[str] = None
+
+    @field_validator("path")
+    def validate_path(cls, v: str):
+        if not v.startswith("/") or v.startswith("//"):
+            raise ValueError("path must be an absolute path on this API, e.g. /api/v1/levels")
+        if v.split("?", 1)[0].rstrip("/") == BATCH_PATH:
+            raise ValueError("batches can't be nested")
+        return v
+
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(min_length=1, max_length=config.batch_max_requests)
+
+    @model_validator(mode="after")
+    def validate_unique_ids(self) -> "BatchRequest":
+        ids = [item.id for item in self.requests]
+        if len(set(ids)) != len(ids):
+            raise ValueError("request ids must be unique")
+        return self
@@ -0,0 +1,25 @@
+from src.util.serializer import ResponseProfile
+from src.v1.admin.schema import Admin, ApiKeyResponse, CreateSemester, CreateVenue, TimeTableResponse
+from src.v1.schema.courses import CourseResponse, DeptResponse, LevelResponse
+from src.v1.schema.timetable import LecturerTimeTableResponse, StudentTimeTableResponse
+from src.v1.schema.user import UserResponse
+from src.v1.service.projections import USER_RELATIONS
+
+# a course's level and department are shown without their own timestamps
+_TIMESTAMPS = {"created_at", "updated_at"}
+
+COURSE = ResponseProfile(
+    CourseResponse, exclude={"level": _TIMESTAMPS, "department": _TIMESTAMPS}, relations=("department", "level")
+)
+LEVEL = ResponseProfile(LevelResponse)
+DEPARTMENT = ResponseProfile(DeptResponse)
+USER = ResponseProfile(UserResponse, relations=USER_RELATIONS)
+ADMIN = ResponseProfile(Admin, exclude={"password"})
+
+STUDENT_TIMETABLE = ResponseProfile(StudentTimeTableResponse)
+LECTURER_TIMETABLE = ResponseProfile(LecturerTimeTableResponse)
+
+VENUE = ResponseProfile(CreateVenue)
+SEMESTER = ResponseProfile(CreateSemester)
+TIMETABLE = ResponseProfile(TimeTableResponse)
+API_KEY = ResponseProfile(ApiKeyResponse)
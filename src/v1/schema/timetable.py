@@ -50,6 +50,21 @@ class StudentTimeTableResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CourseTimetableEntry(BaseModel):
+    """A course's timetable row as cached per course; schedules are derived per request."""
+    course_code: str
+    course_name: str
+    venue_name: str
+    start_time: time
+    duration_minutes: int
+    rrule: str
+    semester_name: Semester_Enum
+    school_session: str
+    semester_end_date: date
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class LecturerTimeTableResponse(BaseModel):
     course_code: str
     course_name: str
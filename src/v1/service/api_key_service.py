@@ -0,0 +1,140 @@
+import hashlib
+import hmac
+import secrets
+import time
+import uuid
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.util import metrics
+from src.util.cache import TTLCache
+from src.util.config import config
+from src.util.db import insert_returning
+from src.util.log import setup_logger
+from src.util.redis_client import incr_counter
+from src.v1.admin.schema import CreateApiKey
+from src.v1.auth.schema import ApiKeyPrincipal
+from src.v1.base.exception import InvalidToken, NotFoundError, RateLimitExceeded, ServerError
+from src.v1.model import ApiKey
+
+logger = setup_logger(__name__, "api_key_service.log")
+
+API_KEY_PREFIX = "nsk_"
+RATE_LIMIT_WINDOW = 60
+
+# verified keys by hash, and False for hashes that matched no active key, so machine
+# traffic is answered without a query; revoking a key only clears this worker's copy
+_api_keys = TTLCache(maxsize=10_000, ttl=config.api_key_cache_ttl)
+
+
+def hash_api_key(key: str) -> str:
+    # keys are long random strings, so a keyed hash is enough (and unlike bcrypt it
+    # is deterministic, which is what lets the hash itself be the lookup key)
+    secret = config.api_key_secret or config.jwt_secret_key
+    if not secret:
+        raise ServerError("API_KEY_SECRET is not configured")
+    return hmac.new(secret.encode(), key.encode(), hashlib.sha256).hexdigest()
+
+
+class ApiKeyService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_api_key(self, data: CreateApiKey, created_by_id: uuid.UUID = None):
+        """Returns (api_key, key); the key itself is not stored and can't be shown again."""
+        key = API_KEY_PREFIX + secrets.token_urlsafe(32)
+        try:
+            stmt = await self.db.execute(
+                insert_returning(
+                    ApiKey,
+                    name=data.name,
+                    key_hash=hash_api_key(key),
+                    prefix=key[: len(API_KEY_PREFIX) + 6],
+                    scopes=[scope.value for scope in data.scopes],
+                    rate_limit_per_minute=data.rate_limit_per_minute or config.api_key_rate_limit_per_minute,
+                    created_by_id=created_by_id,
+                )
+            )
+            api_key = stmt.scalar_one()
+            await self.db.commit()
+            logger.info(f"API key {api_key.id} ({api_key.name}) created with scopes {api_key.scopes}.")
+            return api_key, key
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while creating API key '{data.name}': {e}")
+            await self.db.rollback()
+            raise ServerError()
+
+    async def fetch_all_api_keys(self):
+        try:
+            stmt = await self.db.execute(select(ApiKey).order_by(ApiKey.created_at))
+            return stmt.scalars().all()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while fetching API keys: {e}")
+            raise ServerError()
+
+    async def revoke_api_key(self, api_key_id: uuid.UUID):
+        try:
+            stmt = await self.db.execute(
+                update(ApiKey)
+                .where(ApiKey.id == api_key_id, ApiKey.revoked_at.is_(None))
+                .values(revoked_at=func.now())
+                .returning(ApiKey.key_hash)
+            )
+            key_hash = stmt.scalar_one_or_none()
+            if key_hash is None:
+                raise NotFoundError(f"Active API key with ID {api_key_id} not found")
+            await self.db.commit()
+            _api_keys.pop(key_hash)
+            logger.info(f"API key {api_key_id} revoked.")
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while revoking API key {api_key_id}: {e}")
+            await self.db.rollback()
+            raise ServerError()
+
+    async def authenticate(self, key: str) -> ApiKeyPrincipal:
+        """Resolve an X-API-Key value to its principal and count the request against
+        the key's rate limit."""
+        key_hash = hash_api_key(key)
+        principal = _api_keys.get(key_hash)
+        if principal is None:
+            metrics.incr("api_key_cache.miss")
+            principal = await self._load(key_hash)
+            _api_keys.set(key_hash, principal or False)
+        else:
+            metrics.incr("api_key_cache.hit")
+
+        if not principal:
+            raise InvalidToken("Invalid API key")
+        await self._check_rate_limit(principal)
+        return principal
+
+    async def _load(self, key_hash: str) -> ApiKeyPrincipal | None:
+        try:
+            stmt = await self.db.execute(
+                select(ApiKey.id, ApiKey.name, ApiKey.scopes, ApiKey.rate_limit_per_minute).where(
+                    ApiKey.key_hash == key_hash, ApiKey.revoked_at.is_(None)
+                )
+            )
+            row = stmt.one_or_none()
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while verifying API key: {e}")
+            raise ServerError()
+        return ApiKeyPrincipal.model_validate(row) if row else None
+
+    async def _check_rate_limit(self, principal: ApiKeyPrincipal):
+        window = int(time.time()) // RATE_LIMIT_WINDOW
+        try:
+            count = await incr_counter(f"ratelimit:api_key:{principal.id}:{window}", RATE_LIMIT_WINDOW)
+        except Exception as e:
+            # a redis outage shouldn't take the displays down with it
+            logger.error(f"Rate limit check failed for API key {principal.id}, allowing: {e}")
+            return
+        if count > principal.rate_limit_per_minute:
+            metrics.incr("api_key.rate_limited")
+            logger.warning(f"API key {principal.id} ({principal.name}) exceeded its rate limit.")
+            raise RateLimitExceeded(
+                f"Rate limit of {principal.rate_limit_per_minute} requests per minute exceeded"
+            )
@@ -0,0 +1,79 @@
+"""
+The services of one request, each built on first use and then shared.
+
+    services = ServiceContainer(db)
+    user = await services.users.check_if_user_exist_by_id(user_id)
+
+Services that use other services (users -> courses, lecturers, students;
+lecturers -> courses, users; timetables -> venues, courses, semesters, lecturers)
+get them from the container too, when they first need them. A request so builds
+only the services it touches, each at most once, all on its session and loaders.
+"""
+from functools import cached_property
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.v1.admin.service import AdminService
+from src.v1.service.api_key_service import ApiKeyService
+from src.v1.service.courses import CourseService, DeptService
+from src.v1.service.lecturer_service import LecturerService
+from src.v1.service.level_service import LevelService
+from src.v1.service.loaders import Loaders
+from src.v1.service.semester_service import SemesterService
+from src.v1.service.student_service import StudentService
+from src.v1.service.timetable_service import TimeTableService
+from src.v1.service.user import UserService
+from src.v1.service.venue_service import VenueService
+
+
+class ServiceContainer:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @cached_property
+    def loaders(self) -> Loaders:
+        return Loaders(self.db)
+
+    @cached_property
+    def users(self) -> UserService:
+        return UserService(self.db, self)
+
+    @cached_property
+    def students(self) -> StudentService:
+        return StudentService(self.db)
+
+    @cached_property
+    def lecturers(self) -> LecturerService:
+        return LecturerService(self.db, self)
+
+    @cached_property
+    def courses(self) -> CourseService:
+        return CourseService(self.db, self)
+
+    @cached_property
+    def departments(self) -> DeptService:
+        return DeptService(self.db, self)
+
+    @cached_property
+    def levels(self) -> LevelService:
+        return LevelService(self.db)
+
+    @cached_property
+    def venues(self) -> VenueService:
+        return VenueService(self.db)
+
+    @cached_property
+    def semesters(self) -> SemesterService:
+        return SemesterService(self.db)
+
+    @cached_property
+    def timetables(self) -> TimeTableService:
+        return TimeTableService(self.db, self)
+
+    @cached_property
+    def admins(self) -> AdminService:
+        return AdminService(self.db)
+
+    @cached_property
+    def api_keys(self) -> ApiKeyService:
+        return ApiKeyService(self.db)
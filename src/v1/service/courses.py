@@ -1,15 +1,25 @@
+import asyncio
 import uuid
+from typing import TYPE_CHECKING, List, Optional, Sequence
 
-from sqlalchemy import select, or_
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import func, select, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.util.cache_aside import cached, invalidate_tags
+from src.util.db import FOREIGN_KEY_VIOLATION, insert_returning, integrity_error_details
 from src.util.log import setup_logger
 from src.v1.base.exception import AlreadyExistsError, NotFoundError, ServerError
 from src.v1.model import Course, Department, Level, Role_Enum, User
-from src.v1.schema.courses import CreateCourse
+from src.v1.schema.courses import CourseResponse, CreateCourse
 from src.v1.schema.user import UserCourse
+from src.v1.service.loaders import Loaders
+from src.v1.service.projections import USER_RELATIONS, course_from_row, course_rows, entity_options
+from src.v1.service.reference_data import DEPARTMENTS, reference_cache
+
+if TYPE_CHECKING:
+    from src.v1.service.container import ServiceContainer
 
 logger = setup_logger(__name__, "courses_service.log")
 
@@ -18,33 +28,32 @@ logger = setup_logger(__name__, "courses_service.log")
 
 
 class DeptService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, services: "ServiceContainer"):
         self.db = db
+        self.services = services
+
+    @property
+    def loaders(self) -> Loaders:
+        return self.services.loaders
 
+    # the courses embed their level, so level writes invalidate this too
+    @cached(List[CourseResponse], tags=("dept:{dept_id}", "levels"))
     async def fetch_all_courses_for_a_dept(self, dept_id: uuid.UUID):
-        stmt = await self.db.execute(
-            select(Course)
-            .options(selectinload(Course.department), selectinload(Course.level))
-            .where(Course.department_id == dept_id)
-        )
-        course = stmt.scalars().all()
-        return course
+        stmt = await self.db.execute(course_rows().where(Course.department_id == dept_id))
+        return [course_from_row(row) for row in stmt.all()]
 
     async def fetch_all_dept(self):
-        stmt = await self.db.execute(select(Department))
-        department = stmt.scalars().all()
-        return department
+        return await reference_cache.all(self.db, DEPARTMENTS)
 
     async def create_dept(self, dept_name: str):
         try:
-            existing_dept = await self.check_if_dept_exist_by_name(dept_name)
-            if existing_dept:
+            stmt = await self.db.execute(insert_returning(Department, name=dept_name))
+            new_dept = stmt.scalar_one_or_none()
+            if not new_dept:
                 raise AlreadyExistsError(f"Department '{dept_name}' already exists")
 
-            new_dept = Department(name=dept_name)
-            self.db.add(new_dept)
             await self.db.commit()
-            await self.db.refresh(new_dept)
+            await reference_cache.invalidate(DEPARTMENTS)
             logger.info(f"Department {dept_name} created successfully.")
             return new_dept
         except SQLAlchemyError as e:
@@ -64,6 +73,8 @@ class DeptService:
 
             dept.name = dept_name
             await self.db.commit()
+            await reference_cache.invalidate(DEPARTMENTS)
+            await invalidate_tags("courses", f"dept:{dept_id}")
             await self.db.refresh(dept)
             logger.info(f"Department {dept_name} updated successfully.")
             return dept
@@ -80,6 +91,9 @@ class DeptService:
 
             await self.db.delete(dept)
             await self.db.commit()
+            self.loaders.department.clear(dept_id)
+            await reference_cache.invalidate(DEPARTMENTS)
+            await invalidate_tags("courses", f"dept:{dept_id}")
             logger.info(f"Department {dept.name} deleted successfully.")
             return True
         except SQLAlchemyError as e:
@@ -89,15 +103,13 @@ class DeptService:
 
     async def check_if_dept_exist_by_name(self, dept_name: str):
         stmt = await self.db.execute(
-            select(Department).where(Department.name.ilike(dept_name))
+            select(Department).where(func.lower(Department.name) == dept_name.lower())
         )
         department = stmt.scalar_one_or_none()
         return department
 
     async def check_if_dept_exist_by_id(self, dept_id: uuid.UUID):
-        stmt = await self.db.execute(select(Department).where(Department.id == dept_id))
-        department = stmt.scalar_one_or_none()
-        return department
+        return await self.loaders.department.load(dept_id)
 
     async def check_if_course_exist_for_a_dept_by_course_code(
         self, dept_id: uuid.UUID, course_code: str
@@ -107,7 +119,7 @@ class DeptService:
                 select(Course)
                 .options(selectinload(Course.department))
                 .where(Course.department_id == dept_id)
-                .where(Course.code.ilike(course_code))
+                .where(func.lower(Course.code) == course_code.lower())
             )
             course = stmt.scalar_one_or_none()
             if course:
@@ -134,7 +146,7 @@ class DeptService:
                 select(Course)
                 .options(selectinload(Course.department))
                 .where(Course.department_id == dept_id)
-                .where(Course.name.ilike(course_name))
+                .where(func.lower(Course.name) == course_name.lower())
             )
             course = stmt.scalar_one_or_none()
             if course:
@@ -155,9 +167,17 @@ class DeptService:
 
 
 class CourseService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, services: "ServiceContainer"):
         self.db = db
-        self.dept = DeptService(self.db)
+        self.services = services
+
+    @property
+    def loaders(self) -> Loaders:
+        return self.services.loaders
+
+    @property
+    def dept(self) -> DeptService:
+        return self.services.departments
 
     async def check_if_course_exists(self, name:str, code:str):
         try:
@@ -165,8 +185,8 @@ class CourseService:
                 selectinload(Course.department), selectinload(Course.level)
             ).where(
                 or_(
-                    Course.code.ilike(code),
-                    Course.name.ilike(name)
+                    func.lower(Course.code) == code.lower(),
+                    func.lower(Course.name) == name.lower(),
                 )
             )
             existing_course = (await self.db.execute(stmt)).scalar_one_or_none()
@@ -178,30 +198,15 @@ class CourseService:
             raise ServerError()
 
     async def check_if_course_exists_by_id(self, course_id: uuid.UUID):
-        try:
-            stmt = await self.db.execute(
-                select(Course)
-                .options(selectinload(Course.department), selectinload(Course.level))
-                .where(Course.id == course_id)
-            )
-            course = stmt.scalar_one_or_none()
-            if course:
-                logger.info(
-                    f"Course {course.name} ({course.code}) found with ID {course_id}."
-                )
-            else:
-                logger.info(f"Course with ID {course_id} not found.")
-            return course
-        except SQLAlchemyError as e:
-            logger.error(
-                f"Database error while checking course existence by ID {course_id}: {e}"
-            )
-            raise ServerError()
-        except Exception as e:
-            logger.error(
-                f"An unexpected error occurred while checking course existence by ID {course_id}: {e}"
+        """The course with its department and level, through the request's course loader."""
+        course = await self.loaders.course.load(course_id)
+        if course:
+            logger.info(
+                f"Course {course.name} ({course.code}) found with ID {course_id}."
             )
-            raise ServerError()
+        else:
+            logger.info(f"Course with ID {course_id} not found.")
+        return course
 
     async def create_course(self, course_data: CreateCourse):
         try:
@@ -210,35 +215,26 @@ class CourseService:
             )
             # ideally, only admin can create course (later update)
 
-            # Check if department exists
-            dept_exists = await self.dept.check_if_dept_exist_by_id(course_data.department_id)
-            if not dept_exists:
-                raise NotFoundError(f"Department with ID {course_data.department_id} not found")
-
-            # Check if level exists
-            stmt = await self.db.execute(select(Level).where(Level.id == course_data.level_id))
-            level_exists = stmt.scalar_one_or_none()
-            if not level_exists:
-                raise NotFoundError(f"Level with ID {course_data.level_id} not found")
-
-            existing_course = await self.check_if_course_exists(course_data.name, course_data.code)
-            if existing_course:
+            # one statement: the FKs check department and level, the unique indexes check name/code
+            stmt = await self.db.execute(
+                insert_returning(
+                    Course,
+                    name=course_data.name,
+                    code=course_data.code,
+                    department_id=course_data.department_id,
+                    level_id=course_data.level_id,
+                )
+            )
+            new_course = stmt.scalar_one_or_none()
+            if not new_course:
                 logger.warning(
                     f"Course creation failed: Course with name '{course_data.name}' or code '{course_data.code}' already exists."
                 )
                 raise AlreadyExistsError(
                     f"Course with code '{course_data.code}' or name '{course_data.name}' already exists"
                 )
-
-            new_course = Course(
-                name=course_data.name,
-                code=course_data.code,
-                department_id=course_data.department_id,
-                level_id=course_data.level_id,
-            )
-            self.db.add(new_course)
             await self.db.commit()
-            await self.db.refresh(new_course)
+            await invalidate_tags("courses", f"dept:{course_data.department_id}")
 
             logger.info(f"course data: {new_course.to_dict()}")
 
@@ -258,10 +254,22 @@ class CourseService:
             # logger.info(f"course dict: {course_dict}")
             # return course_dict
         
+        except IntegrityError as e:
+            await self.db.rollback()
+            sqlstate, constraint_name = integrity_error_details(e)
+            if sqlstate == FOREIGN_KEY_VIOLATION:
+                if constraint_name and "department" in constraint_name:
+                    raise NotFoundError(f"Department with ID {course_data.department_id} not found")
+                raise NotFoundError(f"Level with ID {course_data.level_id} not found")
+            logger.error(
+                f"Integrity error while creating course with name '{course_data.name}' and code '{course_data.code}': {e}"
+            )
+            raise ServerError()
         except SQLAlchemyError as e:
             logger.error(
                 f"Database error while creating course with name '{course_data.name}' and code '{course_data.code}': {e}"
             )
+            await self.db.rollback()
             raise ServerError()
         # except Exception as e:
         #     logger.error(f"An unexpected error occurred while creating course with name '{course_data.name}' and code '{course_data.code}': {e}")
@@ -269,12 +277,15 @@ class CourseService:
 
     async def update_course(self, course_id: uuid.UUID, course_data: CreateCourse):
         try:
-            course = await self.check_if_course_exists_by_id(course_id)
+            # the course and the department it moves to, in one round of lookups
+            course, dept_exists = await asyncio.gather(
+                self.check_if_course_exists_by_id(course_id),
+                self.dept.check_if_dept_exist_by_id(course_data.department_id),
+            )
             if not course:
                 raise NotFoundError(f"Course with ID {course_id} not found")
 
             # Check if department exists
-            dept_exists = await self.dept.check_if_dept_exist_by_id(course_data.department_id)
             if not dept_exists:
                 raise NotFoundError(f"Department with ID {course_data.department_id} not found")
 
@@ -291,12 +302,14 @@ class CourseService:
                     f"Course with code '{course_data.code}' or name '{course_data.name}' already exists"
                 )
 
+            previous_dept_id = course.department_id
             course.name = course_data.name
             course.code = course_data.code
             course.department_id = course_data.department_id
             course.level_id = course_data.level_id
 
             await self.db.commit()
+            await invalidate_tags("courses", f"dept:{previous_dept_id}", f"dept:{course_data.department_id}")
             await self.db.refresh(course)
             logger.info(f"Course {course.name} updated successfully.")
             return course
@@ -311,8 +324,11 @@ class CourseService:
             if not course:
                 raise NotFoundError(f"Course with ID {course_id} not found")
 
+            dept_id = course.department_id
             await self.db.delete(course)
             await self.db.commit()
+            self.loaders.course.clear(course_id)
+            await invalidate_tags("courses", f"dept:{dept_id}")
             logger.info(f"Course {course.name} deleted successfully.")
             return True
         except SQLAlchemyError as e:
@@ -320,12 +336,11 @@ class CourseService:
             await self.db.rollback()
             raise ServerError()
 
+    @cached(List[CourseResponse], tags=("courses",))
     async def fetch_all_courses(self):
         try:
-            stmt = await self.db.execute(
-                select(Course).options(selectinload(Course.department), selectinload(Course.level))
-            )
-            courses = stmt.scalars().all()
+            stmt = await self.db.execute(course_rows())
+            courses = [course_from_row(row) for row in stmt.all()]
             logger.info(f"Successfully fetched {len(courses)} courses.")
             return courses
         except SQLAlchemyError as e:
@@ -333,30 +348,18 @@ class CourseService:
             raise ServerError()
 
     async def check_course_dept(self, course_id: uuid.UUID):
-        try:
-            stmt = await self.db.execute(
-                select(Course)
-                .options(selectinload(Course.department))
-                .where(Course.id == course_id)
-            )
-            course = stmt.scalar_one_or_none()
-            if course:
-                logger.info(
-                    f"Course {course.name} ({course.code}) found with ID {course_id} in department {course.department.name}."
-                )
-            else:
-                logger.info(f"Course with ID {course_id} not found.")
-            return course
-        except SQLAlchemyError as e:
-            logger.error(
-                f"Database error while checking course existence by ID {course_id}: {e}"
+        course = await self.loaders.course.load(course_id)
+        if course:
+            logger.info(
+                f"Course {course.name} ({course.code}) found with ID {course_id} in department {course.department.name}."
             )
-            raise ServerError()
-        # except Exception as e:
-        #     logger.error(f"An unexpected error occurred while checking course existence by ID {course_id}: {e}")
-        #     raise ServerError()
+        else:
+            logger.info(f"Course with ID {course_id} not found.")
+        return course
 
-    async def fetch_all_student_taking_course(self, data: UserCourse):
+    async def fetch_all_student_taking_course(
+        self, data: UserCourse, fields: Optional[Sequence[str]] = None, include: Sequence[str] = USER_RELATIONS
+    ):
         try:
             logger.info(f"Fetching course with ID {data.course_id}.")
             # fetch the course, with the lecturer, query to get all student and course sharing the same level
@@ -379,7 +382,7 @@ class CourseService:
             logger.info(f"Fetching all students for level {course.level.name}.")
             stmt = await self.db.execute(
                 select(User)
-                .options(selectinload(User.level), selectinload(User.department))
+                .options(*entity_options(User, fields, include))
                 .where(User.role == Role_Enum.STUDENT, course.level_id == User.level_id)
             )
             students = stmt.scalars().all()
@@ -397,7 +400,9 @@ class CourseService:
         #     logger.error(f"An unexpected error occurred while fetching students for course {data.course_id}: {e}")
         #     raise ServerError()
 
-    async def fetch_all_lecturers_taking_course(self, course_id: uuid.UUID):
+    async def fetch_all_lecturers_taking_course(
+        self, course_id: uuid.UUID, fields: Optional[Sequence[str]] = None, include: Sequence[str] = USER_RELATIONS
+    ):
         """Fetch all lecturers assigned to a specific course."""
         try:
             logger.info(f"Fetching lecturers for course with ID {course_id}.")
@@ -413,10 +418,7 @@ class CourseService:
             stmt = await self.db.execute(
                 select(User)
                 .join(User.courses)  # Join through the many-to-many relationship
-                .options(
-                    selectinload(User.level),
-                    selectinload(User.department)
-                )
+                .options(*entity_options(User, fields, include))
                 .where(
                     User.role == Role_Enum.LECTURER,
                     Course.id == course_id  # Filter by the specific course
@@ -1,32 +1,48 @@
+import asyncio
+
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta, date, time
 from dateutil.rrule import rrulestr
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Sequence
 
+from src.util.cache_aside import cached, get_or_fetch_many, invalidate_tags
 from src.util.log import setup_logger
 from src.v1.base.exception import AlreadyExistsError, AuthorizationError, NotFoundError, ServerError
 from src.v1.model import Role_Enum, User, TimeTable, Course
+from src.v1.model.user import user_course_association
 from src.v1.schema.user import UserCourse
-from src.v1.schema.timetable import LecturerTimeTableResponse, ClassSchedule
+from src.v1.schema.courses import CourseResponse
+from src.v1.schema.timetable import CourseTimetableEntry, LecturerTimeTableResponse, ClassSchedule
 from src.v1.service.courses import CourseService
+from src.v1.service.projections import USER_RELATIONS, course_from_row, course_rows, course_timetable_rows, entity_options
+
+if TYPE_CHECKING:
+    from src.v1.service.container import ServiceContainer
+    from src.v1.service.user import UserService
 
 logger = setup_logger(__name__, "lecturer_service.log")
 
 
 class LecturerService:
-    def __init__(self, db: AsyncSession, course_service: CourseService, user_service):
+    def __init__(self, db: AsyncSession, services: "ServiceContainer"):
         self.db = db
-        self.course = course_service
-        self.user_service = user_service
+        self.services = services
+
+    @property
+    def course(self) -> CourseService:
+        return self.services.courses
 
-    async def fetch_all_lecturers(self):
+    @property
+    def user_service(self) -> "UserService":
+        return self.services.users
+
+    async def fetch_all_lecturers(self, fields: Optional[Sequence[str]] = None, include: Sequence[str] = USER_RELATIONS):
         try:
             stmt = await self.db.execute(
                 select(User)
-                .options(selectinload(User.department))
+                .options(*entity_options(User, fields, include))
                 .where(User.role == Role_Enum.LECTURER)
             )
             lecturers = stmt.scalars().all()
@@ -46,8 +62,13 @@ class LecturerService:
             )
             # lecturers and course must have the same department
 
+            # the lecturer (with their courses) and the course, in one round of lookups
+            user, course = await asyncio.gather(
+                self.user_service.check_if_user_exist_by_id(user_data.user_id),
+                self.course.check_course_dept(user_data.course_id),
+            )
+
             # check if role is lect
-            user = await self.user_service.check_if_user_exist_by_id(user_data.user_id)
             if not user:
                 logger.warning(f"User {user_data.user_id} not found.")
                 raise NotFoundError()
@@ -58,18 +79,12 @@ class LecturerService:
                 )
 
             # check if lecturer is already attached to this course
-            stmt = await self.db.execute(
-                select(User).options(selectinload(User.courses)).where(User.id == user_data.user_id)
-            )
-            user_with_courses = stmt.scalar_one()
-            
-            course_ids = [course.id for course in user_with_courses.courses]
+            course_ids = [linked.id for linked in user.courses]
             if user_data.course_id in course_ids:
                 logger.warning(f"Lecturer {user_data.user_id} is already attached to course {user_data.course_id}.")
                 raise AlreadyExistsError("Lecturer is already assigned to this course")
 
             # check if both the course and user are in the same dept
-            course = await self.course.check_course_dept(user_data.course_id)
             if not course:
                 logger.warning(f"Course {user_data.course_id} not found.")
                 raise NotFoundError()
@@ -84,6 +99,7 @@ class LecturerService:
             user.courses.append(course)
             self.db.add(user)
             await self.db.commit()
+            await invalidate_tags(f"lecturer:{user.id}")
             logger.info(
                 f"Successfully linked lecturer {user.first_name} to course {course.name}."
             )
@@ -102,43 +118,21 @@ class LecturerService:
 
     async def fetch_lecturer_timetable(self, lecturer_id: str):
         try:
-            # First get the lecturer and their courses
-            lecturer_stmt = await self.db.execute(
-                select(User)
-                .options(
-                    selectinload(User.courses).options(
-                        selectinload(Course.level),
-                        selectinload(Course.department)
-                    )
-                )
-                .where(User.id == lecturer_id, User.role == Role_Enum.LECTURER)
-            )
-            lecturer = lecturer_stmt.scalar_one_or_none()
-            if not lecturer:
-                logger.warning(f"Lecturer with id {lecturer_id} not found.")
-                return []
-
-            course_ids = [course.id for course in lecturer.courses]
+            course_ids = [course.id for course in await self.fetch_lecturer_courses(lecturer_id)]
 
             if not course_ids:
                 logger.info(f"No courses found for lecturer {lecturer_id}.")
                 return []
 
-            # Get timetables for these courses
-            timetable_stmt = await self.db.execute(
-                select(TimeTable)
-                .options(
-                selectinload(TimeTable.course).
-                options(
-                selectinload(Course.level),
-                selectinload(Course.department)),
-        
-                selectinload(TimeTable.venue),
-                selectinload(TimeTable.semester)
-                )
-                .where(TimeTable.course_id.in_(course_ids))
+            # every course's timetable in one cache round trip, and one query for the misses
+            timetables_by_course = await get_or_fetch_many(
+                "course_timetables",
+                course_ids,
+                self._load_course_timetables,
+                List[CourseTimetableEntry],
+                tags=("timetables", "courses"),
             )
-            timetables = timetable_stmt.scalars().all()
+            timetables = [entry for course_id in course_ids for entry in timetables_by_course[course_id]]
 
             logger.info(f"Successfully fetched {len(timetables)} timetable entries for lecturer {lecturer_id}.")
 
@@ -147,13 +141,13 @@ class LecturerService:
             for timetable in timetables:
                 schedule = self._parse_rrule_to_schedule(timetable)
                 response = LecturerTimeTableResponse(
-                    course_code=timetable.course.code,
-                    course_name=timetable.course.name,
-                    venue_name=timetable.venue.name,
+                    course_code=timetable.course_code,
+                    course_name=timetable.course_name,
+                    venue_name=timetable.venue_name,
                     start_time=timetable.start_time,
                     duration_minutes=timetable.duration_minutes,
-                    semester_name=timetable.semester.name,
-                    school_session=timetable.semester.school_session,
+                    semester_name=timetable.semester_name,
+                    school_session=timetable.school_session,
                     schedule_count=len(schedule),
                     schedule=schedule
                 )
@@ -169,26 +163,25 @@ class LecturerService:
             )
             raise ServerError()
 
+    async def _load_course_timetables(self, course_ids: List) -> dict:
+        stmt = await self.db.execute(course_timetable_rows().where(TimeTable.course_id.in_(course_ids)))
+        timetables = {course_id: [] for course_id in course_ids}
+        for row in stmt.all():
+            timetables[row.course_id].append(row)
+        return timetables
+
+    @cached(List[CourseResponse], tags=("courses", "lecturer:{lecturer_id}"))
     async def fetch_lecturer_courses(self, lecturer_id: str)-> List:
         """Fetch all courses assigned to a specific lecturer."""
         try:
-            # Get the lecturer and their courses
-            lecturer_stmt = await self.db.execute(
-                select(User)
-                .options(
-                    selectinload(User.courses).options(
-                        selectinload(Course.level),
-                        selectinload(Course.department)
-                    )
-                )
+            # the lecturer's courses through the link table; none if they aren't a lecturer
+            stmt = await self.db.execute(
+                course_rows()
+                .join(user_course_association, user_course_association.c.course_id == Course.id)
+                .join(User, user_course_association.c.user_id == User.id)
                 .where(User.id == lecturer_id, User.role == Role_Enum.LECTURER)
             )
-            lecturer = lecturer_stmt.scalar_one_or_none()
-            if not lecturer:
-                logger.warning(f"Lecturer with id {lecturer_id} not found.")
-                return []
-
-            courses = lecturer.courses
+            courses = [course_from_row(row) for row in stmt.all()]
             logger.info(f"Successfully fetched {len(courses)} courses for lecturer {lecturer_id}.")
             return courses
         except SQLAlchemyError as e:
@@ -208,7 +201,7 @@ class LecturerService:
 
             # Get current date and semester end date
             today = date.today()
-            semester_end = timetable.semester.end_date
+            semester_end = timetable.semester_end_date
 
             # Generate next 15 occurrences within the semester
             occurrences = []
@@ -4,10 +4,13 @@ from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.util.cache_aside import invalidate_tags
+from src.util.db import insert_returning
 from src.util.log import setup_logger
 from src.v1.base.exception import AlreadyExistsError, NotFoundError, ServerError
 from src.v1.model import Level
 from src.v1.model.user import Level_Enum
+from src.v1.service.reference_data import LEVELS, reference_cache
 
 logger = setup_logger(__name__, "level_service.log")
 
@@ -18,8 +21,7 @@ class LevelService:
 
     async def fetch_all_level(self):
         try:
-            stmt = await self.db.execute(select(Level))
-            all_levels = stmt.scalars().all()
+            all_levels = await reference_cache.all(self.db, LEVELS)
             logger.info("Successfully fetched all levels.")
             return all_levels
         except SQLAlchemyError as e:
@@ -71,14 +73,13 @@ class LevelService:
 
     async def create_level(self, level_name: Level_Enum):
         try:
-            existing_level = await self.check_if_level_exist_by_name(level_name)
-            if existing_level:
+            stmt = await self.db.execute(insert_returning(Level, name=level_name))
+            new_level = stmt.scalar_one_or_none()
+            if not new_level:
                 raise AlreadyExistsError(f"Level '{level_name}' already exists")
 
-            new_level = Level(name=level_name)
-            self.db.add(new_level)
             await self.db.commit()
-            await self.db.refresh(new_level)
+            await reference_cache.invalidate(LEVELS)
             logger.info(f"Level {level_name} created successfully.")
             return new_level
         except SQLAlchemyError as e:
@@ -98,6 +99,8 @@ class LevelService:
 
             level.name = level_name
             await self.db.commit()
+            await reference_cache.invalidate(LEVELS)
+            await invalidate_tags("courses", "levels")
             await self.db.refresh(level)
             logger.info(f"Level {level_name} updated successfully.")
             return level
@@ -114,6 +117,8 @@ class LevelService:
 
             await self.db.delete(level)
             await self.db.commit()
+            await reference_cache.invalidate(LEVELS)
+            await invalidate_tags("courses", "levels")
             logger.info(f"Level {level.name} deleted successfully.")
             return True
         except SQLAlchemyError as e:
@@ -0,0 +1,52 @@
+"""
+The loaders one request's services share, see src/util/loader.py.
+
+Entities are loaded with what the services read off them (a user's courses,
+department and level; a course's department and level), so they come out the
+same as the single-row lookups they replace. They belong to the request's
+session, like any entity it loads, and writes through it are seen by every
+later load.
+"""
+import uuid
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from src.util.loader import LoaderRegistry
+from src.util.log import setup_logger
+from src.v1.base.exception import ServerError
+from src.v1.model import Course, Department, User
+
+logger = setup_logger(__name__, "loaders.log")
+
+
+def _uuid(value: Any) -> Optional[uuid.UUID]:
+    """An id as a plain UUID, whether it came as a string, a UUID or the driver's
+    UUID type; None when it isn't one, as no row has that id."""
+    if type(value) is uuid.UUID:
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+class Loaders(LoaderRegistry):
+    def __init__(self, db: AsyncSession):
+        super().__init__()
+        self.db = db
+        # department and level (a course's too) are joined in by default
+        self.user = self.loader(lambda ids: self._by_id(User, ids, selectinload(User.courses)), _uuid)
+        self.course = self.loader(lambda ids: self._by_id(Course, ids), _uuid)
+        self.department = self.loader(lambda ids: self._by_id(Department, ids), _uuid)
+
+    async def _by_id(self, model: Any, ids: List[uuid.UUID], *options) -> Dict[uuid.UUID, Any]:
+        try:
+            stmt = await self.db.execute(select(model).options(*options).where(model.id.in_(ids)))
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while loading {model.__name__} ids {ids}: {e}", exc_info=True)
+            raise ServerError()
+        return {_uuid(entity.id): entity for entity in stmt.scalars().all()}
@@ -0,0 +1,90 @@
+"""
+Column projections for read-only lists.
+
+Each select names exactly the columns its response reads and returns Core rows:
+no entities are built, nothing enters the session's identity map and no
+relationship is loaded. The rows (or, for nested responses, dicts made from them)
+are validated straight into the response schema. Writes still load entities.
+"""
+from typing import Any, Iterable, List, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import load_only, raiseload, selectinload
+
+from src.v1.model import Course, Department, Level, Semester, TimeTable, Venue
+
+# the relationships a UserResponse embeds
+USER_RELATIONS = ("department", "level")
+
+
+def columns_for(model: Any, schema: Any) -> Select:
+    """Select the columns of `model` that the flat `schema` has fields for."""
+    return select_columns(model, schema.model_fields)
+
+
+def select_columns(model: Any, names: Iterable[str]) -> Select:
+    return select(*(getattr(model, name) for name in names))
+
+
+def entity_options(model: Any, fields: Optional[Iterable[str]], include: Iterable[str]) -> List:
+    """Loader options for entities that are only read for a response: just the
+    `fields` columns (all of them when None), and only the `include`d relationships.
+    Every other relationship, eager by default or not, is left unloaded and raises
+    if touched."""
+    options = [*(selectinload(getattr(model, name)) for name in include), raiseload("*")]
+    if fields is not None:
+        columns = [getattr(model, name) for name in fields]
+        # and the columns the included relationships are loaded through
+        for name in include:
+            columns.extend(getattr(model, column.key) for column in getattr(model, name).property.local_columns)
+        options.append(load_only(*columns))
+    return options
+
+
+def course_rows() -> Select:
+    """A CourseResponse's columns, with its department and level joined in. Their
+    timestamps aren't selected: courses are always shown without them."""
+    return (
+        select(
+            Course.id,
+            Course.name,
+            Course.code,
+            Department.id.label("department_id"),
+            Department.name.label("department_name"),
+            Level.id.label("level_id"),
+            Level.name.label("level_name"),
+        )
+        .join(Department, Course.department_id == Department.id)
+        .join(Level, Course.level_id == Level.id)
+    )
+
+
+def course_from_row(row) -> dict:
+    return {
+        "id": row.id,
+        "name": row.name,
+        "code": row.code,
+        "department": {"id": row.department_id, "name": row.department_name},
+        "level": {"id": row.level_id, "name": row.level_name},
+    }
+
+
+def course_timetable_rows() -> Select:
+    """A CourseTimetableEntry's columns (plus the course id) for each timetable row."""
+    return (
+        select(
+            TimeTable.course_id,
+            Course.code.label("course_code"),
+            Course.name.label("course_name"),
+            Venue.name.label("venue_name"),
+            TimeTable.start_time,
+            TimeTable.duration_minutes,
+            TimeTable.rrule,
+            Semester.name.label("semester_name"),
+            Semester.school_session,
+            Semester.end_date.label("semester_end_date"),
+        )
+        .join(Course, TimeTable.course_id == Course.id)
+        .join(Venue, TimeTable.venue_id == Venue.id)
+        .join(Semester, TimeTable.semester_id == Semester.id)
+    )
@@ -0,0 +1,45 @@
+"""
+Reference data served from the two-tier cache (src/util/reference_cache.py):
+levels, departments, venues and semesters. The cached items are shared schema
+instances; callers read them and must not modify them.
+"""
+from src.util.config import config
+from src.util.db import async_session
+from src.util.reference_cache import Dataset, ReferenceCache
+from src.v1.admin.schema import CreateSemester, CreateVenue
+from src.v1.model import Department, Level, Semester, Venue
+from src.v1.schema.courses import DeptResponse, LevelResponse
+from src.v1.service.projections import columns_for
+
+LEVELS = "levels"
+DEPARTMENTS = "departments"
+VENUES = "venues"
+SEMESTERS = "semesters"
+
+reference_cache = ReferenceCache(ttl=config.reference_cache_ttl, local_ttl=config.reference_cache_local_ttl)
+
+reference_cache.register(Dataset(
+    LEVELS, LevelResponse, lambda: columns_for(Level, LevelResponse),
+    indexes={"id": lambda level: level.id, "name": lambda level: level.name},
+))
+# names are matched case-insensitively, like the lower() lookups they replace
+reference_cache.register(Dataset(
+    DEPARTMENTS, DeptResponse, lambda: columns_for(Department, DeptResponse),
+    indexes={"id": lambda dept: dept.id, "name": lambda dept: dept.name.lower()},
+))
+reference_cache.register(Dataset(
+    VENUES, CreateVenue, lambda: columns_for(Venue, CreateVenue),
+    indexes={"id": lambda venue: venue.id, "name": lambda venue: venue.name.lower()},
+))
+reference_cache.register(Dataset(
+    SEMESTERS, CreateSemester, lambda: columns_for(Semester, CreateSemester),
+    indexes={
+        "id": lambda semester: semester.id,
+        "session_name": lambda semester: (semester.school_session, semester.name),
+    },
+))
+
+
+async def warm_reference_cache():
+    async with async_session() as db:
+        await reference_cache.warm_up(db)
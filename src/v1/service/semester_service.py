@@ -3,6 +3,8 @@ from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.util.cache_aside import invalidate_tags
+from src.util.db import insert_returning
 from src.util.log import setup_logger
 from src.v1.base.exception import (
     AlreadyExistsError,
@@ -12,6 +14,7 @@ from src.v1.base.exception import (
 from src.v1.model import Semester
 
 from src.v1.admin.schema import CreateSemester
+from src.v1.service.reference_data import SEMESTERS, reference_cache
 
 logger = setup_logger(__name__, "semester_service.log")
 
@@ -22,11 +25,13 @@ class SemesterService:
 
     async def check_if_semester_exist_by_session(self, session: str, semester_name: str = None):
         try:
-            query = select(Semester).where(Semester.school_session == session)
             if semester_name:
-                query = query.where(Semester.name == semester_name)
-            stmt = await self.db.execute(query)
-            return stmt.scalar_one_or_none()
+                return await reference_cache.get(self.db, SEMESTERS, "session_name", (session, semester_name))
+            semesters = [
+                semester for semester in await reference_cache.all(self.db, SEMESTERS)
+                if semester.school_session == session
+            ]
+            return semesters[0] if semesters else None
         except SQLAlchemyError as e:
             logger.error(
                 f"Database error while checking semester existence by session '{session}' and name '{semester_name}': {e}"
@@ -55,11 +60,7 @@ class SemesterService:
 
     async def fetch_all_semesters(self):
         try:
-            stmt = await self.db.execute(select(Semester))
-            semesters = stmt.scalars().all()
-            if not semesters:
-                return []
-            return semesters
+            return await reference_cache.all(self.db, SEMESTERS)
         except SQLAlchemyError as e:
             logger.error(f"errors fetching semesters: {e}")
             raise ServerError()
@@ -70,25 +71,25 @@ class SemesterService:
                 f"Attempting to create semester with session: {semester_data.school_session}"
             )
 
-            # Check if semester exists by session and name
-            existing_semester = await self.check_if_semester_exist_by_session(semester_data.school_session, semester_data.name)
-            if existing_semester:
+            # Insert unless (school_session, name) is taken
+            stmt = await self.db.execute(
+                insert_returning(
+                    Semester,
+                    name=semester_data.name,
+                    school_session=semester_data.school_session,
+                    start_date=semester_data.start_date,
+                    end_date=semester_data.end_date,
+                )
+            )
+            new_semester = stmt.scalar_one_or_none()
+            if not new_semester:
                 logger.warning(f"Semester with session '{semester_data.school_session}' and name '{semester_data.name}' already exists.")
                 raise AlreadyExistsError(
                     f"Semester with session '{semester_data.school_session}' and name '{semester_data.name}' already exists"
                 )
 
-            # Create new semester
-            new_semester = Semester(
-                name=semester_data.name,
-                school_session=semester_data.school_session,
-                start_date=semester_data.start_date,
-                end_date=semester_data.end_date,
-            )
-
-            self.db.add(new_semester)
             await self.db.commit()
-            await self.db.refresh(new_semester)
+            await reference_cache.invalidate(SEMESTERS)
             logger.info(
                 f"Semester {new_semester.school_session} created successfully with id {new_semester.id}."
             )
@@ -114,6 +115,8 @@ class SemesterService:
             semester.end_date = semester_data.end_date
 
             await self.db.commit()
+            await reference_cache.invalidate(SEMESTERS)
+            await invalidate_tags("timetables")
             await self.db.refresh(semester)
             logger.info(f"Semester {semester.school_session} updated successfully.")
             return semester
@@ -130,6 +133,8 @@ class SemesterService:
 
             await self.db.delete(semester)
             await self.db.commit()
+            await reference_cache.invalidate(SEMESTERS)
+            await invalidate_tags("timetables")
             logger.info(f"Semester {semester.school_session} deleted successfully.")
             return True
         except SQLAlchemyError as e:
@@ -4,12 +4,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from datetime import datetime, timedelta, date, time
 from dateutil.rrule import rrulestr
-from typing import List
+from typing import List, Optional, Sequence
 
 from src.util.log import setup_logger
 from src.v1.base.exception import ServerError
-from src.v1.model import Role_Enum, User, TimeTable, Course
+from src.v1.model import Role_Enum, User, Course
 from src.v1.schema.timetable import StudentTimeTableResponse, ClassSchedule
+from src.v1.service.projections import USER_RELATIONS, course_timetable_rows, entity_options
 
 logger = setup_logger(__name__, "student_service.log")
 
@@ -18,11 +19,11 @@ class StudentService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def fetch_all_students(self):
+    async def fetch_all_students(self, fields: Optional[Sequence[str]] = None, include: Sequence[str] = USER_RELATIONS):
         try:
             stmt = await self.db.execute(
                 select(User)
-                .options(selectinload(User.department), selectinload(User.level))
+                .options(*entity_options(User, fields, include))
                 .where(User.role == Role_Enum.STUDENT)
             )
             students = stmt.scalars().all()
@@ -37,50 +38,42 @@ class StudentService:
             )
             raise ServerError()
 
+    async def stream_all_students(self, batch_size: int = 500):
+        """Yield every student from a server-side cursor, `batch_size` rows at a time."""
+        try:
+            result = await self.db.stream_scalars(
+                select(User)
+                .options(selectinload(User.department), selectinload(User.level))
+                .where(User.role == Role_Enum.STUDENT)
+                .execution_options(yield_per=batch_size)
+            )
+            count = 0
+            async for student in result:
+                count += 1
+                yield student
+            logger.info(f"Successfully streamed {count} students.")
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while streaming students: {e}")
+            raise ServerError()
+
     async def fetch_student_timetable(self, student_id: str):
         try:
-            # First get the student to find their level and department
+            # only the student's level and department are needed to find their courses
             student_stmt = await self.db.execute(
-                select(User)
-                .options(selectinload(User.level), selectinload(User.department))
+                select(User.level_id, User.department_id)
                 .where(User.id == student_id, User.role == Role_Enum.STUDENT)
             )
-            student = student_stmt.scalar_one_or_none()
+            student = student_stmt.one_or_none()
             if not student:
                 logger.warning(f"Student with id {student_id} not found.")
                 return []
 
-            # Get courses for the student's level and department
-            course_stmt = await self.db.execute(
-            select(Course).options(
-                selectinload(Course.level),
-                selectinload(Course.department)
-            )
-                .where(Course.level_id == student.level_id, Course.department_id == student.department_id)
-            )
-            courses = course_stmt.scalars().all()
-            course_ids = [course.id for course in courses]
-
-            if not course_ids:
-                logger.info(f"No courses found for student {student_id}.")
-                return []
-
-            # Get timetables for these courses
+            # the timetable rows of every course for that level and department
             timetable_stmt = await self.db.execute(
-            select(TimeTable)
-                .options(
-                    # 1. Load the course and its nested relations
-                    selectinload(TimeTable.course).options(
-                        selectinload(Course.level),
-                        selectinload(Course.department)
-                    ),
-                    # 2. Load venue and semester (Directly from TimeTable)
-                    selectinload(TimeTable.venue),
-                    selectinload(TimeTable.semester)
-                )
-                .where(TimeTable.course_id.in_(course_ids))
+                course_timetable_rows()
+                .where(Course.level_id == student.level_id, Course.department_id == student.department_id)
             )
-            timetables = timetable_stmt.scalars().all()
+            timetables = timetable_stmt.all()
 
             logger.info(f"Successfully fetched {len(timetables)} timetable entries for student {student_id}.")
 
@@ -89,13 +82,13 @@ class StudentService:
             for timetable in timetables:
                 schedule = self._parse_rrule_to_schedule(timetable)
                 response = StudentTimeTableResponse(
-                    course_code=timetable.course.code,
-                    course_name=timetable.course.name,
-                    venue_name=timetable.venue.name,
+                    course_code=timetable.course_code,
+                    course_name=timetable.course_name,
+                    venue_name=timetable.venue_name,
                     start_time=timetable.start_time,
                     duration_minutes=timetable.duration_minutes,
-                    semester_name=timetable.semester.name,
-                    school_session=timetable.semester.school_session,
+                    semester_name=timetable.semester_name,
+                    school_session=timetable.school_session,
                     schedule_count=len(schedule),
                     schedule=schedule
                 )
@@ -119,7 +112,7 @@ class StudentService:
 
             # Get current date and semester end date
             today = date.today()
-            semester_end = timetable.semester.end_date
+            semester_end = timetable.semester_end_date
 
             # Generate next 15 occurrences within the semester
             occurrences = []
@@ -1,12 +1,14 @@
 import uuid
+from typing import TYPE_CHECKING, Optional, Sequence
 from datetime import date, datetime, time, timedelta, timezone
 
 from dateutil.rrule import rrulestr
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import raiseload, selectinload
 
+from src.util.cache_aside import invalidate_tags
 from src.util.log import setup_logger
 from src.v1.base.exception import (
     AlreadyExistsError,
@@ -16,21 +18,40 @@ from src.v1.base.exception import (
 from src.v1.model import TimeTable, TimeTableException
 from src.v1.service.courses import CourseService
 
-from src.v1.admin.schema import CreateTimeTable
+from src.v1.admin.schema import CreateTimeTable, TimeTableResponse
+from src.v1.service.projections import select_columns
 from .venue_service import VenueService
 from .semester_service import SemesterService
 from .lecturer_service import LecturerService
 
+if TYPE_CHECKING:
+    from src.v1.service.container import ServiceContainer
+
 logger = setup_logger(__name__, "timetable_service.log")
 
 
 class TimeTableService:
-    def __init__(self, db: AsyncSession, venue_service: VenueService, course_service: CourseService, semester_service: SemesterService, lecturer_service: LecturerService):
+    def __init__(self, db: AsyncSession, services: "ServiceContainer"):
         self.db = db
-        self.venue_service = venue_service
-        self.course_service = course_service
-        self.semester_service = semester_service
-        self.lecturer_service = lecturer_service
+        self.services = services
+
+    # the other services, built when first used
+
+    @property
+    def venue_service(self) -> VenueService:
+        return self.services.venues
+
+    @property
+    def course_service(self) -> CourseService:
+        return self.services.courses
+
+    @property
+    def semester_service(self) -> SemesterService:
+        return self.services.semesters
+
+    @property
+    def lecturer_service(self) -> LecturerService:
+        return self.services.lecturers
         
     @staticmethod
     def make_aware(start, end=None):
@@ -286,6 +307,7 @@ class TimeTableService:
             )
             self.db.add(new_schedule)
             await self.db.commit()
+            await invalidate_tags("timetables")
             await self.db.refresh(new_schedule)
             logger.info(
                 f"Successfully created timetable {new_schedule.id} for course {timetable_data.course_id} in venue {timetable_data.venue_id}."
@@ -297,18 +319,33 @@ class TimeTableService:
             await self.db.rollback()
             raise ServerError()
 
-    async def fetch_all_timetables(self):
+    async def fetch_all_timetables(self, fields: Optional[Sequence[str]] = None):
         try:
-            stmt = await self.db.execute(
-                select(TimeTable).options(selectinload(TimeTable.semester), selectinload(TimeTable.course), selectinload(TimeTable.venue))
-            )
-            timetables = stmt.scalars().all()
+            stmt = await self.db.execute(select_columns(TimeTable, fields or TimeTableResponse.model_fields))
+            timetables = stmt.all()
             logger.info(f"Successfully fetched {len(timetables)} timetables.")
             return timetables
         except SQLAlchemyError as e:
             logger.error(f"Database error while fetching all timetables: {e}")
             raise ServerError()
 
+    async def stream_all_timetables(self, batch_size: int = 500):
+        """Yield every timetable from a server-side cursor, `batch_size` rows at a time."""
+        try:
+            result = await self.db.stream_scalars(
+                select(TimeTable)
+                .options(raiseload("*"))  # export rows are flat, never touch relationships
+                .execution_options(yield_per=batch_size)
+            )
+            count = 0
+            async for timetable in result:
+                count += 1
+                yield timetable
+            logger.info(f"Successfully streamed {count} timetables.")
+        except SQLAlchemyError as e:
+            logger.error(f"Database error while streaming timetables: {e}")
+            raise ServerError()
+
     async def fetch_timetable_by_id(self, timetable_id):
         try:
             stmt = await self.db.execute(
@@ -344,6 +381,7 @@ class TimeTableService:
             timetable.rrule = rrule_str
 
             await self.db.commit()
+            await invalidate_tags("timetables")
             await self.db.refresh(timetable)
             logger.info(f"Timetable {timetable_id} updated successfully.")
             return timetable
@@ -360,6 +398,7 @@ class TimeTableService:
 
             await self.db.delete(timetable)
             await self.db.commit()
+            await invalidate_tags("timetables")
             logger.info(f"Timetable {timetable_id} deleted successfully.")
             return True
         except SQLAlchemyError as e:
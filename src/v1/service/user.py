@@ -1,13 +1,18 @@
 import uuid
+from typing import TYPE_CHECKING, Optional, Sequence
 
-from sqlalchemy import select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from src.util.cache import TTLCache
+from src.util.config import config
+from src.util.db import FOREIGN_KEY_VIOLATION, insert_returning, integrity_error_details
 from src.util.log import setup_logger
-from src.v1.auth.schema import Login
-from src.v1.auth.service import verify_password
+from src.util.redis_client import delete_cache, get_cache, set_cache
+from src.v1.auth.schema import Login, Principal
+from src.v1.auth.service import verify_and_update_password_async
 from src.v1.base.exception import (
     AlreadyExistsError,
     AuthorizationError,
@@ -15,22 +20,52 @@ from src.v1.base.exception import (
     NotFoundError,
     ServerError,
 )
-from src.v1.model import Department, Level, Role_Enum, User
+from src.v1.model import Role_Enum, User
 from src.v1.schema.user import CreateStudent, CreateUser
 from src.v1.service.courses import CourseService
 from src.v1.service.lecturer_service import LecturerService
+from src.v1.service.loaders import Loaders
+from src.v1.service.projections import USER_RELATIONS, entity_options
 from src.v1.service.student_service import StudentService
-from src.v1.auth.service import password_hash
+from src.v1.service.reference_data import DEPARTMENTS, LEVELS, reference_cache
+from src.v1.auth.service import password_hash_async
+
+if TYPE_CHECKING:
+    from src.v1.service.container import ServiceContainer
 
 logger = setup_logger(__name__, "user_service.log")
 
+# get_current_user runs on every protected request, so the principal is served from
+# this process first, then redis, and only then from the users table
+_principals = TTLCache(maxsize=10_000, ttl=config.principal_cache_ttl)
+
+
+def _principal_key(user_id) -> str:
+    return f"principal:{user_id}"
+
 
 class UserService:
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, services: "ServiceContainer"):
         self.db = db
-        self.course = CourseService(self.db)
-        self.lecturer = LecturerService(self.db, self.course, self)
-        self.student = StudentService(self.db)
+        self.services = services
+
+    # the request's loaders and other services, built when first used
+
+    @property
+    def loaders(self) -> Loaders:
+        return self.services.loaders
+
+    @property
+    def course(self) -> CourseService:
+        return self.services.courses
+
+    @property
+    def lecturer(self) -> LecturerService:
+        return self.services.lecturers
+
+    @property
+    def student(self) -> StudentService:
+        return self.services.students
 
     async def create_user(self, user_data: CreateUser | CreateStudent ):
         try:
@@ -38,51 +73,51 @@ class UserService:
             logger.info(
                 f"Attempting to create user with email: {user_data.email} and school_id: {user_data.school_id}"
             )
-            user = await self.check_if_user_exist_by_email(
-                user_data.email
-            ) or await self.check_if_user_exist_by_school_id(user_data.school_id)
-
-            if user:
-                logger.warning(f"User with ID {user.id} already exists.")
-                raise AlreadyExistsError(f"User with ID {user.id} already exist")
-
-            password = password_hash(user_data.password)
-            user_data.password = password
-
-            # seed department, fetch the department, link users to dept both lecturer and student(link level too)
-            #
-            stmt = await self.db.execute(
-                select(Department).where(Department.name.ilike(user_data.department))
-            )
-            dept = stmt.scalar_one_or_none()
+            # link users to dept both lecturer and student (students to a level too), resolved
+            # from the reference cache before paying for the password hash
+            dept = await reference_cache.get(self.db, DEPARTMENTS, "name", user_data.department.lower())
             if not dept:
                 raise NotFoundError(f"{user_data.department} not found")
-
-            # link student to level
             level = None
-            if user_data.role == Role_Enum.STUDENT and user_data.level is not None:
-                # seed the level in the db, query the level table based on student level, link to users
-                stmt = await self.db.execute(
-                    select(Level).where(Level.name == user_data.level)
-                )
-                level = stmt.scalar_one_or_none()
+            if user_data.role == Role_Enum.STUDENT and getattr(user_data, "level", None) is not None:
+                level = await reference_cache.get(self.db, LEVELS, "name", user_data.level)
                 if not level:
                     raise NotFoundError(f"{user_data.level} not found")
 
-            new_user = User(
-                email=user_data.email,
-                first_name=user_data.first_name,
-                last_name=user_data.last_name,
-                password=user_data.password,
-                school_id=user_data.school_id,
-                role=user_data.role,
-                level=level,
-                department=dept,
-            )
+            password = await password_hash_async(user_data.password, user_data.role)
+            user_data.password = password
+
+            try:
+                stmt = await self.db.execute(
+                    insert_returning(
+                        User,
+                        email=user_data.email,
+                        first_name=user_data.first_name,
+                        last_name=user_data.last_name,
+                        password=user_data.password,
+                        school_id=user_data.school_id,
+                        role=user_data.role,
+                        level_id=level.id if level else None,
+                        department_id=dept.id,
+                    )
+                )
+            except IntegrityError as e:
+                # the department or level was deleted since it was cached
+                await self.db.rollback()
+                sqlstate, _ = integrity_error_details(e)
+                if sqlstate == FOREIGN_KEY_VIOLATION:
+                    raise NotFoundError(f"{user_data.department} or {getattr(user_data, 'level', None)} not found")
+                raise
+            new_user = stmt.scalar_one_or_none()
+            if not new_user:
+                logger.warning(
+                    f"User with email {user_data.email} or school ID {user_data.school_id} already exists."
+                )
+                raise AlreadyExistsError(
+                    f"User with email {user_data.email} or school ID {user_data.school_id} already exist"
+                )
 
-            self.db.add(new_user)
             await self.db.commit()
-            await self.db.refresh(new_user)
             logger.info(f"User {new_user.id} created successfully.")
             return new_user
         except SQLAlchemyError as e:
@@ -120,12 +155,21 @@ class UserService:
                 )
 
             # verify password
-            if not verify_password(user_data.password, user.password):
+            is_valid, new_hash = await verify_and_update_password_async(
+                user_data.password, user.password, user.role
+            )
+            if not is_valid:
                 logger.warning(
                     f"Authentication failed: Invalid password for user {user.id}."
                 )
                 raise InvalidEmailPassword()
 
+            # the stored hash predates the current hashing policy, replace it while we have the password
+            if new_hash:
+                user.password = new_hash
+                await self.db.commit()
+                logger.info(f"Password hash for user {user.id} upgraded to the current policy.")
+
             # do further authentication
 
             # prepare jwt payload
@@ -145,7 +189,7 @@ class UserService:
             stmt = await self.db.execute(
                 select(User)
                 .options(selectinload(User.department))
-                .where(User.email.ilike(email))
+                .where(func.lower(User.email) == email.lower())
             )
             user = stmt.scalar_one_or_none()
             if user:
@@ -158,35 +202,56 @@ class UserService:
             raise ServerError()
 
     async def check_if_user_exist_by_id(self, id: uuid.UUID):
+        """The user with their courses, department and level, through the request's
+        user loader: batched with the other lookups of the moment, then memoized."""
+        logger.debug(f"Checking if user exists with id: {id}")
+        user = await self.loaders.user.load(id)
+        if user:
+            logger.debug(f"User with id {id} found.")
+        else:
+            logger.debug(f"User with id {id} not found.")
+        return user
+
+    async def get_principal(self, user_id: uuid.UUID) -> Principal | None:
+        key = _principal_key(user_id)
+        principal = _principals.get(key)
+        if principal is not None:
+            return principal
+
+        cached = await get_cache(key)
+        if cached:
+            principal = Principal.model_validate(cached)
+            _principals.set(key, principal)
+            return principal
+
         try:
-            logger.debug(f"Checking if user exists with id: {id}")
+            logger.debug(f"Loading principal for user id: {user_id}")
             stmt = await self.db.execute(
-                select(User)
-                .options(
-                    selectinload(User.courses),
-                    selectinload(User.department),
-                    selectinload(User.level),
-                    # selectinload(User.level),
-                )
-                .where(User.id == id)
+                select(User.id, User.role, User.level_id, User.department_id).where(User.id == user_id)
             )
-            user = stmt.scalar_one_or_none()
-            if user:
-                logger.debug(f"User with id {id} found.")
-            else:
-                logger.debug(f"User with id {id} not found.")
-            return user
+            row = stmt.one_or_none()
         except SQLAlchemyError as e:
-            logger.error(
-                f"Error checking if user exists by id {id}: {e}", exc_info=True
-            )
+            logger.error(f"Error loading principal for user id {user_id}: {e}", exc_info=True)
             raise ServerError()
+        if row is None:
+            logger.debug(f"User with id {user_id} not found.")
+            return None
+
+        principal = Principal.model_validate(row)
+        _principals.set(key, principal)
+        await set_cache(key, principal.model_dump(mode="json"), ttl=config.principal_cache_ttl)
+        return principal
+
+    async def invalidate_principal(self, user_id: uuid.UUID):
+        key = _principal_key(user_id)
+        _principals.pop(key)
+        await delete_cache(key)
 
     async def check_if_user_exist_by_school_id(self, school_id: str):
         try:
             logger.debug(f"Checking if user exists with school ID: {school_id}")
             stmt = await self.db.execute(
-                select(User).where(User.school_id.ilike(school_id))
+                select(User).where(func.lower(User.school_id) == school_id.lower())
             )
             user = stmt.scalar_one_or_none()
             if user:
@@ -198,11 +263,14 @@ class UserService:
             logger.error(f"Error checking if user exists by school ID {school_id}: {e}")
             raise ServerError()
 
-    async def fetch_all_lecturers(self):
-        return await self.lecturer.fetch_all_lecturers()
+    async def fetch_all_lecturers(self, fields: Optional[Sequence[str]] = None, include: Sequence[str] = USER_RELATIONS):
+        return await self.lecturer.fetch_all_lecturers(fields, include)
 
-    async def fetch_all_students(self):
-        return await self.student.fetch_all_students()
+    async def fetch_all_students(self, fields: Optional[Sequence[str]] = None, include: Sequence[str] = USER_RELATIONS):
+        return await self.student.fetch_all_students(fields, include)
+
+    def stream_all_students(self):
+        return self.student.stream_all_students()
 
     async def link_lecturer_to_course(self, user_data):
         return await self.lecturer.link_lecturer_to_course(user_data)
@@ -230,25 +298,20 @@ class UserService:
             user.role = user_data.role
 
             # Update department
-            stmt = await self.db.execute(
-                select(Department).where(Department.name.ilike(user_data.department))
-            )
-            dept = stmt.scalar_one_or_none()
+            dept = await reference_cache.get(self.db, DEPARTMENTS, "name", user_data.department.lower())
             if not dept:
                 raise NotFoundError(f"Department {user_data.department} not found")
-            user.department = dept
+            user.department_id = dept.id
 
             # Update level if student
             if user_data.role == Role_Enum.STUDENT and hasattr(user_data, 'level') and user_data.level:
-                stmt = await self.db.execute(
-                    select(Level).where(Level.name == user_data.level)
-                )
-                level = stmt.scalar_one_or_none()
+                level = await reference_cache.get(self.db, LEVELS, "name", user_data.level)
                 if not level:
                     raise NotFoundError(f"Level {user_data.level} not found")
-                user.level = level
+                user.level_id = level.id
 
             await self.db.commit()
+            await self.invalidate_principal(user_id)
             await self.db.refresh(user)
             logger.info(f"User {user_id} updated successfully.")
             return user
@@ -265,6 +328,8 @@ class UserService:
 
             await self.db.delete(user)
             await self.db.commit()
+            self.loaders.user.clear(user_id)
+            await self.invalidate_principal(user_id)
             logger.info(f"User {user_id} deleted successfully.")
             return True
         except SQLAlchemyError as e:
@@ -272,15 +337,9 @@ class UserService:
             await self.db.rollback()
             raise ServerError()
 
-    async def fetch_all_users(self):
+    async def fetch_all_users(self, fields: Optional[Sequence[str]] = None, include: Sequence[str] = USER_RELATIONS):
         try:
-            stmt = await self.db.execute(
-                select(User).options(
-                    selectinload(User.department),
-                    selectinload(User.level),
-                    selectinload(User.courses)
-                )
-            )
+            stmt = await self.db.execute(select(User).options(*entity_options(User, fields, include)))
             users = stmt.scalars().all()
             logger.info(f"Successfully fetched {len(users)} users.")
             return users
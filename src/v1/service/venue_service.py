@@ -3,6 +3,8 @@ from sqlalchemy import func, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.util.cache_aside import invalidate_tags
+from src.util.db import insert_returning
 from src.util.log import setup_logger
 from src.v1.base.exception import (
     AlreadyExistsError,
@@ -12,6 +14,7 @@ from src.v1.base.exception import (
 from src.v1.model import Venue
 
 from src.v1.admin.schema import CreateVenue
+from src.v1.service.reference_data import VENUES, reference_cache
 
 logger = setup_logger(__name__, "venue_service.log")
 
@@ -34,8 +37,7 @@ class VenueService:
 
     async def check_if_venue_exist_by_id(self, venue_id):
         try:
-            stmt = await self.db.execute(select(Venue).where(Venue.id == venue_id))
-            return stmt.scalar_one_or_none()
+            return await reference_cache.get(self.db, VENUES, "id", venue_id)
         except SQLAlchemyError as e:
             logger.error(
                 f"Database error while checking venue existence by id '{venue_id}': {e}"
@@ -54,11 +56,7 @@ class VenueService:
 
     async def fetch_all_venues(self):
         try:
-            stmt = await self.db.execute(select(Venue))
-            venue = stmt.scalars().all()
-            if not venue:
-                return []
-            return venue
+            return await reference_cache.all(self.db, VENUES)
         except SQLAlchemyError as e:
             logger.error(f"errors fetching venues: {e}")
             raise ServerError()
@@ -69,20 +67,17 @@ class VenueService:
                 f"Attempting to create venue with name: {venue_data.name}"
             )
 
-            # Check if venue exists by name
-            existing_venue = await self.check_if_venue_exist_by_name(venue_data.name)
-            if existing_venue:
+            # Insert unless the name is taken (case-insensitive unique index)
+            stmt = await self.db.execute(insert_returning(Venue, name=venue_data.name))
+            new_venue = stmt.scalar_one_or_none()
+            if not new_venue:
                 logger.warning(f"Venue with name '{venue_data.name}' already exists.")
                 raise AlreadyExistsError(
                     f"Venue with name '{venue_data.name}' already exists"
                 )
 
-            # Create new venue
-            new_venue = Venue(name=venue_data.name)
-
-            self.db.add(new_venue)
             await self.db.commit()
-            await self.db.refresh(new_venue)
+            await reference_cache.invalidate(VENUES)
             logger.info(
                 f"Venue {new_venue.name} created successfully with id {new_venue.id}."
             )
@@ -98,13 +93,15 @@ class VenueService:
 
     async def update_venue(self, venue_id, venue_data: CreateVenue):
         try:
-            venue = await self.fetch_venue_by_id(venue_id)
+            venue = await self.db.get(Venue, venue_id)
             if not venue:
                 raise NotFoundError()
 
             venue.name = venue_data.name
 
             await self.db.commit()
+            await reference_cache.invalidate(VENUES)
+            await invalidate_tags("timetables")
             await self.db.refresh(venue)
             logger.info(f"Venue {venue.name} updated successfully.")
             return venue
@@ -115,12 +112,14 @@ class VenueService:
 
     async def delete_venue(self, venue_id):
         try:
-            venue = await self.fetch_venue_by_id(venue_id)
+            venue = await self.db.get(Venue, venue_id)
             if not venue:
                 raise NotFoundError()
 
             await self.db.delete(venue)
             await self.db.commit()
+            await reference_cache.invalidate(VENUES)
+            await invalidate_tags("timetables")
             logger.info(f"Venue {venue.name} deleted successfully.")
             return True
         except SQLAlchemyError as e: